@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class MedicineInventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'Medicine_inventory'
\ No newline at end of file
+    name = 'Medicine_inventory'
+
+    def ready(self):
+        # Connect the receivers that keep the dashboard statistics cache fresh.
+        import Medicine_inventory.signals
@@ -0,0 +1,113 @@
+"""
+Buffered audit log for both inventories.
+
+record_action() queues an unsaved MedicineAction or NonMedicalProductAction
+instead of inserting it. Within a request the queue is written by the
+request_finished receiver in Medicine_inventory.signals, after the response
+has gone out, with one bulk_create per model. The insert therefore never
+delays the page. Each row's timestamp is set when it is queued, so it still
+says when the action happened. A row can therefore be written after rows with
+later timestamps; code following new rows (the dashboard's live action log)
+must go by id, which is assigned at write time.
+
+Outside a request (management commands, the shell) rows are written straight
+away unless the code runs inside buffered(). Either way a queue that reaches
+AUDIT_BUFFER_SIZE rows is written early, which bounds memory for bulk jobs.
+
+The response has usually gone out by the time the queue is written, so no
+error can reach the user. If a bulk_create fails, its rows are written one at
+a time, and any row that still fails is logged as lost.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.db import DatabaseError, transaction
+
+AUDIT_BUFFER_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+# Rows queued on this thread; None when not buffering
+_local = threading.local()
+
+
+def _queue():
+    return getattr(_local, 'queue', None)
+
+
+def start_buffering():
+    if _queue() is None:
+        _local.queue = []
+
+
+def _save_each(model, entries):
+    """Fallback for a failed bulk_create: save rows singly, logging those that fail."""
+    written = 0
+    for entry in entries:
+        # bulk_create may have numbered some rows before it failed
+        entry.pk = None
+        entry._state.adding = True
+        try:
+            with transaction.atomic():
+                entry.save(force_insert=True)
+            written += 1
+        except DatabaseError:
+            logger.exception('Could not write a %s audit row.', model.__name__)
+    if written < len(entries):
+        logger.error('%d of %d %s audit rows were lost.', len(entries) - written, len(entries), model.__name__)
+    return written
+
+
+def flush():
+    """Write the queued rows, one bulk_create per model. Returns how many were written."""
+    queue = _queue()
+    if not queue:
+        return 0
+    _local.queue = []
+    by_model = {}
+    for entry in queue:
+        by_model.setdefault(type(entry), []).append(entry)
+    written = 0
+    for model, entries in by_model.items():
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(entries, batch_size=AUDIT_BUFFER_SIZE)
+            written += len(entries)
+        except DatabaseError:
+            logger.exception('Bulk write of %d %s audit rows failed; writing them one at a time.',
+                             len(entries), model.__name__)
+            written += _save_each(model, entries)
+    return written
+
+
+def stop_buffering():
+    """Write what is queued and go back to writing rows immediately."""
+    try:
+        return flush()
+    finally:
+        _local.queue = None
+
+
+@contextmanager
+def buffered():
+    """Queue audit rows for the duration of the block; nested blocks share the outer queue."""
+    if _queue() is not None:
+        yield
+        return
+    start_buffering()
+    try:
+        yield
+    finally:
+        stop_buffering()
+
+
+def record_action(entry):
+    """Queue an unsaved audit row, or save it now when nothing is buffering."""
+    queue = _queue()
+    if queue is None:
+        entry.save()
+        return
+    queue.append(entry)
+    if len(queue) >= AUDIT_BUFFER_SIZE:
+        flush()
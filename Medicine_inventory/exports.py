@@ -0,0 +1,32 @@
+import csv
+
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the value back, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def streaming_csv_response(filename, header, rows):
+    """
+    Stream `header` followed by `rows` as a CSV attachment.
+
+    `rows` should be a lazy iterable (e.g. queryset.values_list(...).iterator()),
+    so memory stays flat however large the export is and the first bytes are
+    sent before the whole table has been read.
+    """
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -21,6 +21,19 @@ class MedicineForm(forms.ModelForm):
             'image': forms.FileInput(attrs={'class': 'form-control', 'accept': 'image/*'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Posts back the stock the user was shown, so changed_data tells an edit
+        # from a level that was dispensed from since the form was opened
+        self.fields['quantity_in_stock'].show_hidden_initial = True
+
+    def save(self, commit=True):
+        if self.instance.pk and 'quantity_in_stock' not in self.changed_data:
+            # Back to the level loaded with the instance; Medicine.save() then
+            # leaves the column alone
+            self.instance.quantity_in_stock = self.initial['quantity_in_stock']
+        return super().save(commit)
+
     def clean(self):
         cleaned_data = super().clean()
         cost_price = cleaned_data.get('cost_price')
@@ -0,0 +1,90 @@
+"""
+Stock ledger.
+
+Every change to a batch's quantity_in_stock is appended as a StockMovement.
+Inventory edits are recorded by Medicine_inventory.signals. Dispensing and
+returns are recorded by Medicine_inventory.stock, in the same transaction as
+their UPDATE. Movements are never changed afterwards.
+
+Medicine.objects.bulk_create() and QuerySet.update() send no model signals,
+so they bypass the ledger: code that sets stock that way must call
+record_movements() itself (as stock.py does), or stock_at() will drift from
+quantity_in_stock. Today only the benchmark commands bulk_create batches,
+inside a transaction they roll back.
+
+The snapshot_stock command folds the movements since the previous snapshot
+into one StockSnapshot row per batch. Stock at any moment is then the latest
+snapshot before it plus the movements in between, a range scan of at most
+one snapshot period however long the ledger grows.
+"""
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from .models import StockMovement, StockSnapshot
+
+
+def record_movements(deltas, reason, reference=''):
+    """Append [(medicine_id, delta)] with one INSERT; zero deltas are skipped."""
+    rows = [
+        StockMovement(medicine_id=medicine_id, delta=delta, reason=reason, reference=reference)
+        for medicine_id, delta in deltas if delta
+    ]
+    if rows:
+        StockMovement.objects.bulk_create(rows)
+
+
+def record_movement(medicine_id, delta, reason, reference=''):
+    record_movements([(medicine_id, delta)], reason, reference)
+
+
+def latest_snapshot_time(when):
+    return StockSnapshot.objects.filter(taken_at__lte=when).aggregate(latest=Max('taken_at'))['latest']
+
+
+def stock_levels_at(when, medicine_ids=None):
+    """{medicine_id: units in stock at `when`}; batches with no stock are left out."""
+    taken_at = latest_snapshot_time(when)
+    movements = StockMovement.objects.filter(created_at__lte=when)
+    snapshots = StockSnapshot.objects.filter(taken_at=taken_at)
+    if taken_at is not None:
+        movements = movements.filter(created_at__gt=taken_at)
+    if medicine_ids is not None:
+        movements = movements.filter(medicine_id__in=medicine_ids)
+        snapshots = snapshots.filter(medicine_id__in=medicine_ids)
+
+    levels = dict(snapshots.values_list('medicine_id', 'quantity')) if taken_at is not None else {}
+    totals = movements.values('medicine_id').annotate(total=Sum('delta')).values_list('medicine_id', 'total')
+    for medicine_id, total in totals:
+        levels[medicine_id] = levels.get(medicine_id, 0) + total
+    return {medicine_id: quantity for medicine_id, quantity in levels.items() if quantity}
+
+
+def stock_at(medicine_id, when):
+    """Units of one batch in stock at `when`."""
+    return stock_levels_at(when, [medicine_id]).get(medicine_id, 0)
+
+
+def start_of_today():
+    return timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def take_snapshot(taken_at=None):
+    """
+    Snapshot every batch's stock at `taken_at`, by default the start of today.
+    Returns the number of rows written, or None if that snapshot already exists.
+    """
+    taken_at = taken_at or start_of_today()
+    if taken_at > timezone.now():
+        # Movements still to come would be missing from it
+        raise ValueError('A snapshot cannot be taken in the future.')
+    with transaction.atomic():
+        if StockSnapshot.objects.filter(taken_at=taken_at).exists():
+            return None
+        levels = stock_levels_at(taken_at)
+        StockSnapshot.objects.bulk_create(
+            [StockSnapshot(medicine_id=medicine_id, taken_at=taken_at, quantity=quantity)
+             for medicine_id, quantity in levels.items()],
+            batch_size=1000,
+        )
+    return len(levels)
@@ -0,0 +1,86 @@
+import csv
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from accounts.models import User
+from Medicine_inventory.models import Medicine
+from Medicine_inventory.views import MEDICINE_CSV_HEADER, export_medicine_csv
+
+
+def legacy_export(request):
+    # The in-memory HttpResponse export that export_medicine_csv used to build.
+    response = HttpResponse(content_type='text/csv')
+    writer = csv.writer(response)
+    writer.writerow(MEDICINE_CSV_HEADER)
+    for med in Medicine.objects.all():
+        writer.writerow([
+            med.name, med.brand, med.category, med.description, med.dosage, med.selling_price, med.cost_price,
+            med.quantity_in_stock, med.reorder_level, med.manufacture_date, med.expiry_date,
+            med.batch_number, med.supplier
+        ])
+    return response
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures peak Python memory, time to first byte and total time of the '
+        'legacy and streaming medicine CSV exports. Rows are created inside a '
+        'transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/medicine/export/csv/')
+        request.user = User(username='benchmark', role='pharmacist')
+
+        with transaction.atomic():
+            self._seed(options['rows'])
+            for label, view in (('legacy', legacy_export), ('streaming', export_medicine_csv)):
+                first_byte, total, peak, size = self._measure(view, request)
+                self.stdout.write(
+                    f"{label:>10}: first byte {first_byte:8.1f} ms | total {total:8.1f} ms | "
+                    f"peak memory {peak / 2**20:7.1f} MiB | {size / 2**20:.1f} MiB written"
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _measure(view, request):
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = view(request)
+        size, first_byte = 0, None
+        chunks = response.streaming_content if response.streaming else [response.content]
+        for chunk in chunks:
+            if first_byte is None:
+                first_byte = (time.perf_counter() - start) * 1000
+            size += len(chunk)
+        total = (time.perf_counter() - start) * 1000
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return first_byte, total, peak, size
+
+    @staticmethod
+    def _seed(rows):
+        today = date.today()
+        Medicine.objects.bulk_create(
+            [
+                Medicine(
+                    name=f"Bench {i % 500}", brand='Bench', category='Analgesic',
+                    description='Benchmark row', dosage='10mg',
+                    quantity_in_stock=i % 100, reorder_level=10,
+                    manufacture_date=today - timedelta(days=365),
+                    expiry_date=today + timedelta(days=i % 700),
+                    batch_number=f"BENCH-{i:08d}", supplier='Bench',
+                )
+                for i in range(rows)
+            ],
+            batch_size=2000,
+        )
@@ -0,0 +1,73 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from Medicine_inventory.models import Medicine
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the old per-row Python expiry/low-stock filtering with the '
+        'MedicineQuerySet SQL filters at increasing row counts. '
+        'All rows are created inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 50000])
+        parser.add_argument('--page-size', type=int, default=24)
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        self.stdout.write(f"{'rows':>8} {'python near (ms)':>18} {'sql near (ms)':>15} {'python low (ms)':>17} {'sql low (ms)':>14}")
+        for size in options['sizes']:
+            with transaction.atomic():
+                self._seed(size)
+                py_near = self._time(lambda: self._python_filter('near')[:page_size])
+                sql_near = self._time(lambda: list(Medicine.objects.near_expiry().with_status().order_by('name', 'id')[:page_size]))
+                py_low = self._time(lambda: self._python_filter('low')[:page_size])
+                sql_low = self._time(lambda: list(Medicine.objects.low_stock().with_status().order_by('name', 'id')[:page_size]))
+                transaction.set_rollback(True)
+            self.stdout.write(f"{size:>8} {py_near:>18.1f} {sql_near:>15.1f} {py_low:>17.1f} {sql_low:>14.1f}")
+
+    def _seed(self, size):
+        today = date.today()
+        Medicine.objects.bulk_create(
+            [
+                Medicine(
+                    name=f"Bench {i % 500}",
+                    brand='Bench',
+                    category='Analgesic',
+                    dosage='10mg',
+                    quantity_in_stock=random.randint(0, 100),
+                    reorder_level=random.randint(5, 20),
+                    manufacture_date=today - timedelta(days=365),
+                    expiry_date=today + timedelta(days=random.randint(-30, 730)),
+                    batch_number=f"BENCH-{i:08d}",
+                    supplier='Bench',
+                )
+                for i in range(size)
+            ],
+            batch_size=1000,
+        )
+
+    @staticmethod
+    def _python_filter(mode):
+        # The filtering loop the inventory views used before MedicineQuerySet.
+        filtered = []
+        for med in Medicine.objects.all().order_by('name', 'id'):
+            low_stock = med.quantity_in_stock < med.reorder_level
+            if mode == 'near' and not med.is_near_expiry():
+                continue
+            if mode == 'low' and not low_stock:
+                continue
+            filtered.append(med)
+        return filtered
+
+    @staticmethod
+    def _time(func):
+        start = time.perf_counter()
+        func()
+        return (time.perf_counter() - start) * 1000
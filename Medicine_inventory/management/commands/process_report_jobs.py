@@ -0,0 +1,119 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Medicine_inventory.models import ReportJob
+from Medicine_inventory.report_worker import init_worker, render_report
+from Medicine_inventory.reports import complete_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Renders queued inventory PDF reports (ReportJob rows) in a process pool '
+        'and stores them under MEDIA_ROOT/reports/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2,
+                            help='Pool size. 0 renders in this process (useful for debugging).')
+        parser.add_argument('--poll-interval', type=float, default=2.0)
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty instead of polling forever.')
+        parser.add_argument('--stale-after', type=int, default=30,
+                            help='Requeue jobs left running for this many minutes by a dead worker; '
+                                 'checked on every poll.')
+
+    def handle(self, *args, **options):
+        if options['workers'] == 0:
+            self._run_inline(options)
+        else:
+            self._run_pool(options)
+
+    def _requeue_stale(self, minutes, running=()):
+        """Requeue jobs another (crashed) worker left running; never the ones in `running` here."""
+        cutoff = timezone.now() - timedelta(minutes=minutes)
+        requeued = ReportJob.objects.filter(status='running', started_at__lt=cutoff).exclude(
+            pk__in=[job.pk for job in running]
+        ).update(status='pending', started_at=None)
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale report job(s).'))
+
+    def _claim(self, limit):
+        """Atomically move up to `limit` pending jobs to running; safe with several workers."""
+        claimed = []
+        candidates = ReportJob.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True)
+        for pk in candidates[:limit]:
+            if ReportJob.objects.filter(pk=pk, status='pending').update(status='running', started_at=timezone.now()):
+                claimed.append(ReportJob.objects.get(pk=pk))
+        return claimed
+
+    def _finish(self, job, render):
+        try:
+            complete_job(job, pdf=render())
+            self.stdout.write(self.style.SUCCESS(f'Rendered {job}.'))
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            complete_job(job, error=str(e))
+            self.stdout.write(self.style.ERROR(f'Failed {job}: {e}'))
+
+    def _run_inline(self, options):
+        while True:
+            self._requeue_stale(options['stale_after'])
+            jobs = self._claim(1)
+            if not jobs:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            job = jobs[0]
+            self._finish(job, lambda: render_report(job.report_type, job.params))
+
+    def _run_pool(self, options):
+        # Spawned (not forked) processes so no database connection is shared with the parent.
+        context = multiprocessing.get_context('spawn')
+        while True:
+            running = {}
+            with ProcessPoolExecutor(max_workers=options['workers'], mp_context=context,
+                                     initializer=init_worker) as pool:
+                try:
+                    self._serve(pool, running, options)
+                    return
+                except BrokenProcessPool:
+                    # A worker was killed (e.g. out of memory); any job in flight may
+                    # be the cause, so fail them all rather than retry them forever.
+                    for job in running.values():
+                        complete_job(job, error='The worker process rendering this report died.')
+                    self.stdout.write(self.style.ERROR(
+                        f'A worker process died; failed {len(running)} job(s) and restarted the pool.'
+                    ))
+
+    def _serve(self, pool, running, options):
+        """Feed the pool until the queue is empty (with --once); raises BrokenProcessPool if a worker dies."""
+        workers = options['workers']
+        while True:
+            self._requeue_stale(options['stale_after'], running.values())
+            claimed = self._claim(workers - len(running))
+            for index, job in enumerate(claimed):
+                try:
+                    running[pool.submit(render_report, job.report_type, job.params)] = job
+                except BrokenProcessPool:
+                    # Not started yet: put them back for the rebuilt pool
+                    ReportJob.objects.filter(pk__in=[job.pk for job in claimed[index:]]).update(
+                        status='pending', started_at=None
+                    )
+                    raise
+            if not running:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+            for future in done:
+                self._finish(running[future], future.result)
+                del running[future]
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from Medicine_inventory.ledger import take_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Folds the stock ledger into a StockSnapshot per batch, so stock at a past '
+        'date never has to replay the whole ledger. Run daily (e.g. from cron) '
+        'shortly after midnight.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--at', help='Snapshot time as YYYY-MM-DD[THH:MM]; defaults to the start of today.')
+
+    def handle(self, *args, **options):
+        taken_at = None
+        if options['at']:
+            try:
+                taken_at = timezone.make_aware(datetime.fromisoformat(options['at']))
+            except ValueError as e:
+                raise CommandError(f'Invalid --at: {e}')
+        try:
+            written = take_snapshot(taken_at)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if written is None:
+            self.stdout.write(self.style.WARNING('A snapshot at that time already exists.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Snapshot of {written} batch(es) written.'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:53
+
+from django.db import migrations, models
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Medicine_inventory', '0013_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['name', 'dosage', 'expiry_date'], name='medicine_fefo_idx'),
+        ),
+    ]
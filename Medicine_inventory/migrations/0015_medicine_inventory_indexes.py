@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:58
+
+from django.db import migrations, models
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Medicine_inventory', '0014_medicine_fefo_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['category', 'name'], name='medicine_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['expiry_date', 'quantity_in_stock', 'reorder_level'], name='medicine_expiry_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['quantity_in_stock'], name='medicine_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['-manufacture_date'], name='medicine_manufacture_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(condition=models.Q(('quantity_in_stock__lt', models.F('reorder_level'))), fields=['name'], name='medicine_low_stock_idx'),
+        ),
+    ]
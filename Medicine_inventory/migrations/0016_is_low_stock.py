@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Medicine_inventory', '0015_medicine_inventory_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='medicine',
+            name='medicine_low_stock_idx',
+        ),
+        migrations.AddField(
+            model_name='medicine',
+            name='is_low_stock',
+            field=models.GeneratedField(db_persist=True, expression=models.ExpressionWrapper(models.Q(('quantity_in_stock__lt', models.F('reorder_level'))), output_field=models.BooleanField()), output_field=models.BooleanField()),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(condition=models.Q(('is_low_stock', True)), fields=['name'], name='medicine_low_stock_idx'),
+        ),
+    ]
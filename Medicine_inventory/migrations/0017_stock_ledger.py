@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+RECEIVED = 1
+
+
+def record_opening_stock(apps, schema_editor):
+    # Stock on hand before the ledger existed becomes one movement per batch
+    Medicine = apps.get_model('Medicine_inventory', 'Medicine')
+    StockMovement = apps.get_model('Medicine_inventory', 'StockMovement')
+    StockMovement.objects.bulk_create(
+        [StockMovement(medicine_id=pk, delta=quantity, reason=RECEIVED, reference='opening balance')
+         for pk, quantity in Medicine.objects.filter(quantity_in_stock__gt=0).values_list('pk', 'quantity_in_stock')],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Medicine_inventory', '0016_is_low_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('reason', models.PositiveSmallIntegerField(choices=[(1, 'Received'), (2, 'Adjusted'), (3, 'Dispensed'), (4, 'Returned'), (5, 'Removed')])),
+                ('reference', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('medicine', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='stock_movements', to='Medicine_inventory.medicine')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['medicine', 'created_at'], name='stock_movement_medicine_idx'), models.Index(fields=['created_at'], name='stock_movement_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('medicine', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='stock_snapshots', to='Medicine_inventory.medicine')),
+            ],
+            options={
+                'unique_together': {('taken_at', 'medicine')},
+            },
+        ),
+        migrations.RunPython(record_opening_stock, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,53 @@
 from django.db import models
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
 from datetime import date, timedelta
 from django.conf import settings
+from django.utils import timezone
+
+
+class MedicineQuerySet(models.QuerySet):
+    """
+    Expiry and stock filters evaluated by the database, mirroring
+    Medicine.is_expired() / Medicine.is_near_expiry() so views never have
+    to load every batch into Python to flag or filter it.
+    """
+    NEAR_EXPIRY_DAYS = 7
+
+    def expired(self, today=None):
+        today = today or date.today()
+        return self.filter(expiry_date__lte=today)
+
+    def near_expiry(self, days=NEAR_EXPIRY_DAYS, today=None):
+        today = today or date.today()
+        return self.filter(expiry_date__gt=today, expiry_date__lte=today + timedelta(days=days))
+
+    def low_stock(self):
+        return self.filter(is_low_stock=True)
+
+    def with_status(self, days=NEAR_EXPIRY_DAYS, today=None):
+        """Annotate each row with the low_stock / near_expiry / expired flags used by the templates."""
+        today = today or date.today()
+        return self.annotate(
+            low_stock=F('is_low_stock'),
+            near_expiry=ExpressionWrapper(
+                Q(expiry_date__gt=today, expiry_date__lte=today + timedelta(days=days)),
+                output_field=BooleanField(),
+            ),
+            expired=ExpressionWrapper(Q(expiry_date__lte=today), output_field=BooleanField()),
+        )
+
+    def apply_filters(self, category=None, expiry=None, low_stock=None):
+        """Apply the category / expiry / low_stock GET filters shared by the inventory views."""
+        queryset = self
+        if category:
+            queryset = queryset.filter(category=category)
+        if expiry == 'near':
+            queryset = queryset.near_expiry()
+        elif expiry == 'expired':
+            queryset = queryset.expired()
+        if low_stock == 'low':
+            queryset = queryset.low_stock()
+        return queryset
 
 
 class Medicine(models.Model):
@@ -59,6 +106,61 @@ class Medicine(models.Model):
     expiry_date = models.DateField()
     batch_number = models.CharField(max_length=150, unique=True)
     supplier = models.CharField(max_length=100)
+    # Kept by the database, so low-stock filters and counts can use an index.
+    # Only valid as loaded: save() drops it so the next read fetches it again,
+    # but instances are not told about QuerySet.update() (e.g. dispensing), so
+    # refresh_from_db(fields=['is_low_stock']) after those.
+    is_low_stock = models.GeneratedField(
+        expression=ExpressionWrapper(Q(quantity_in_stock__lt=F('reorder_level')), output_field=BooleanField()),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
+
+    objects = MedicineQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # First-expiry-first-out batch lookups (Medicine_inventory.stock.fefo_batches);
+            # also serves the default name ordering of the inventory pages
+            models.Index(fields=['name', 'dosage', 'expiry_date'], name='medicine_fefo_idx'),
+            # Category filter with name keyset paging, and the per-category chart counts
+            models.Index(fields=['category', 'name'], name='medicine_category_name_idx'),
+            # Near-expiry / expired ranges; with the stock columns the dashboard
+            # counts are answered from the index without reading the rows
+            models.Index(fields=['expiry_date', 'quantity_in_stock', 'reorder_level'], name='medicine_expiry_stock_idx'),
+            # Sorting the table by stock level
+            models.Index(fields=['quantity_in_stock'], name='medicine_stock_idx'),
+            # "Recent medicines" on the dashboard
+            models.Index(fields=['-manufacture_date'], name='medicine_manufacture_idx'),
+            # Only the low-stock rows, by name; a partial index where the backend
+            # supports one, skipped elsewhere (e.g. MySQL)
+            models.Index(fields=['name'], name='medicine_low_stock_idx', condition=Q(is_low_stock=True)),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_stock = instance.__dict__.get('quantity_in_stock')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Dispensing changes stock with conditional UPDATEs while edit forms are
+        # open (Medicine_inventory.stock). A save that leaves quantity_in_stock
+        # as it was loaded does not write it, so it cannot undo those.
+        if (
+            not self._state.adding and kwargs.get('update_fields') is None
+            and self.quantity_in_stock == getattr(self, '_loaded_stock', None)
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated and field.name != 'quantity_in_stock'
+            ]
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'quantity_in_stock' in update_fields:
+            self._loaded_stock = self.quantity_in_stock
+        # The database has recomputed it; read it again on next access
+        self.__dict__.pop('is_low_stock', None)
 
     def is_expired(self):
         return date.today() >= self.expiry_date
@@ -73,6 +175,54 @@ class Medicine(models.Model):
     def __str__(self):
         return f"{self.name} - {self.dosage} ({self.batch_number})"
 
+class StockMovement(models.Model):
+    """
+    One change to a batch's quantity_in_stock. Rows are only ever appended
+    (see Medicine_inventory.ledger), so a batch's stock is the sum of its deltas.
+    """
+    RECEIVED, ADJUSTED, DISPENSED, RETURNED, REMOVED = 1, 2, 3, 4, 5
+    REASON_CHOICES = [
+        (RECEIVED, 'Received'),
+        (ADJUSTED, 'Adjusted'),
+        (DISPENSED, 'Dispensed'),
+        (RETURNED, 'Returned'),
+        (REMOVED, 'Removed'),
+    ]
+    # No database constraint: the history outlives a deleted batch
+    medicine = models.ForeignKey(
+        Medicine, on_delete=models.DO_NOTHING, db_constraint=False, related_name='stock_movements'
+    )
+    delta = models.IntegerField()
+    reason = models.PositiveSmallIntegerField(choices=REASON_CHOICES)
+    # What caused the movement, e.g. "prescription:42"; blank for inventory edits
+    reference = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # One batch's movements between a snapshot and a given time
+            models.Index(fields=['medicine', 'created_at'], name='stock_movement_medicine_idx'),
+            # Every batch's movements in that range, when a snapshot is taken
+            models.Index(fields=['created_at'], name='stock_movement_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_reason_display()} {self.delta:+d} (medicine #{self.medicine_id}) at {self.created_at}"
+
+class StockSnapshot(models.Model):
+    """A batch's stock at `taken_at`, written by the snapshot_stock command. Batches with none left have no row."""
+    medicine = models.ForeignKey(
+        Medicine, on_delete=models.DO_NOTHING, db_constraint=False, related_name='stock_snapshots'
+    )
+    taken_at = models.DateTimeField()
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('taken_at', 'medicine')
+
+    def __str__(self):
+        return f"{self.quantity} of medicine #{self.medicine_id} at {self.taken_at}"
+
 class MedicineAction(models.Model):
     ACTION_CHOICES = [
         ('created', 'Created'),
@@ -83,8 +233,61 @@ class MedicineAction(models.Model):
     medicine_name = models.CharField(max_length=255, blank=True, null=True)
     batch_number = models.CharField(max_length=255, blank=True, null=True)
     action = models.CharField(max_length=10, choices=ACTION_CHOICES)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the action is recorded, not when the buffered row is written (Medicine_inventory.audit)
+    timestamp = models.DateTimeField(default=timezone.now)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        indexes = [
+            # Newest-first action log, paged by (timestamp, id) cursors
+            models.Index(fields=['timestamp', 'id'], name='medicine_action_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.medicine.name} {self.get_action_display()} at {self.timestamp}"
+
+class ReportJob(models.Model):
+    """A queued inventory PDF report, rendered by the process_report_jobs worker."""
+    REPORT_TYPE_CHOICES = [
+        ('medicine', 'Medicine Inventory'),
+        ('non_medical', 'Non-Medical Products'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    report_type = models.CharField(max_length=20, choices=REPORT_TYPE_CHOICES)
+    # Filters captured from the request (e.g. category / search for non-medical products).
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', db_index=True)
+    file = models.FileField(upload_to='reports/', blank=True, null=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} report #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+
+class CacheVersion(models.Model):
+    """
+    A counter per cached dataset, bumped when the data changes. Processes keep
+    their own copies (the default cache is per process), so they compare the
+    version they loaded with this row instead of relying on a shared cache.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
     def __str__(self):
-        return f"{self.medicine.name} {self.get_action_display()} at {self.timestamp}"
\ No newline at end of file
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,126 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+def encode_cursor(value, pk):
+    """Encode the (sort value, pk) of a boundary row as an opaque URL-safe cursor."""
+    if isinstance(value, datetime):
+        # DjangoJSONEncoder keeps only milliseconds; the cursor must match the row exactly
+        value = value.isoformat()
+    payload = json.dumps([value, pk], cls=DjangoJSONEncoder)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (sort value, pk) for a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+class KeysetPage:
+    """One page of a keyset (seek) paginated queryset."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _seek(field, value, pk, greater):
+    lookup = 'gt' if greater else 'lt'
+    # Same rows as `field > value OR (field = value AND pk > pk)`, but the outer
+    # range lets the database walk an index on `field` in order instead of
+    # sorting every row past the cursor.
+    return Q(**{f'{field}__{lookup}e': value}) & (Q(**{f'{field}__{lookup}': value}) | Q(**{f'pk__{lookup}': pk}))
+
+
+def _cursor_position(queryset, sort_field, cursor):
+    """
+    (sort value, pk) of a cursor, with the value converted to `sort_field`'s type.
+    None, so the first page is served, for a malformed cursor or one taken from a
+    page sorted by another field (e.g. a stale bookmark or a changed sort link).
+    """
+    position = decode_cursor(cursor)
+    if position is None or position[0] is None:
+        return None
+    value, pk = position
+    try:
+        field = queryset.model._meta.get_field(sort_field)
+    except FieldDoesNotExist:
+        return value, pk
+    try:
+        return field.to_python(value), pk
+    except (ValidationError, ValueError, TypeError):
+        return None
+
+
+def _row_value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def _row_pk(row):
+    if isinstance(row, dict):
+        return row['id']
+    return row.pk
+
+
+def keyset_paginate(queryset, sort_field, descending=False, after=None, before=None, page_size=24):
+    """
+    Paginate `queryset` by (`sort_field`, pk) without OFFSET or COUNT, so every
+    page costs the same as the first one.
+
+    `after` / `before` are cursors taken from a previous page's next_cursor /
+    previous_cursor. Rows built with .values() must include `sort_field` and 'id'.
+    """
+    after = _cursor_position(queryset, sort_field, after)
+    before = _cursor_position(queryset, sort_field, before) if after is None else None
+    forward_order = [f'-{sort_field}', '-pk'] if descending else [sort_field, 'pk']
+    backward_order = [sort_field, 'pk'] if descending else [f'-{sort_field}', '-pk']
+
+    if before is not None:
+        rows = list(
+            queryset.filter(_seek(sort_field, *before, greater=descending))
+            .order_by(*backward_order)[:page_size + 1]
+        )
+        more_before = len(rows) > page_size
+        rows = rows[:page_size]
+        rows.reverse()
+        more_after = True
+    else:
+        if after is not None:
+            queryset = queryset.filter(_seek(sort_field, *after, greater=not descending))
+        rows = list(queryset.order_by(*forward_order)[:page_size + 1])
+        more_after = len(rows) > page_size
+        rows = rows[:page_size]
+        more_before = after is not None
+
+    next_cursor = previous_cursor = None
+    if rows and more_after:
+        next_cursor = encode_cursor(_row_value(rows[-1], sort_field), _row_pk(rows[-1]))
+    if rows and more_before:
+        previous_cursor = encode_cursor(_row_value(rows[0], sort_field), _row_pk(rows[0]))
+    return KeysetPage(rows, next_cursor, previous_cursor)
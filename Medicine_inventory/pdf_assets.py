@@ -0,0 +1,102 @@
+"""
+Process-wide cache of static files used by the PDF templates (logo, fonts, CSS).
+
+Templates reference assets as ``pdf-asset:<path under static/>`` and WeasyPrint
+resolves them through asset_url_fetcher(), which serves the bytes from memory.
+Each entry is re-read only when the file's mtime changes.
+
+Stylesheets go through stylesheet(), which keeps the parsed weasyprint.CSS so
+the rules are compiled once per process instead of once per document.
+
+WeasyPrint itself is imported on first use, so apps that only read assets
+(e.g. to hash them) load without it.
+"""
+import functools
+import mimetypes
+import os
+import threading
+
+from django.conf import settings
+
+ASSET_SCHEME = 'pdf-asset:'
+LOGO_URL = ASSET_SCHEME + 'MediSyn_Logo/1.png'
+
+_assets = {}
+_stylesheets = {}
+_lock = threading.Lock()
+
+
+def _asset_root():
+    return os.path.join(settings.BASE_DIR, 'static')
+
+
+def read_asset(relative_path):
+    """Return (bytes, mime type) for a file under static/, re-reading it only when it changes."""
+    root = os.path.realpath(_asset_root())
+    path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f'PDF asset outside static/: {relative_path}')
+
+    mtime = os.stat(path).st_mtime_ns
+    cached = _assets.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    mime_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    with _lock:
+        _assets[path] = (mtime, data, mime_type)
+    return data, mime_type
+
+
+def stylesheet(relative_path):
+    """Return the parsed weasyprint.CSS for a stylesheet under static/, re-parsing it only when it changes."""
+    data, _ = read_asset(relative_path)
+    cached = _stylesheets.get(relative_path)
+    # read_asset hands back the same bytes object until the file changes
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    from weasyprint import CSS
+    css = CSS(string=data.decode('utf-8'), url_fetcher=asset_url_fetcher())
+    with _lock:
+        _stylesheets[relative_path] = (data, css)
+    return css
+
+
+def clear_assets():
+    with _lock:
+        _assets.clear()
+        _stylesheets.clear()
+
+
+@functools.cache
+def _fetcher_factory():
+    try:
+        from weasyprint.urls import URLFetcher, URLFetcherResponse
+    except ImportError:  # WeasyPrint < 68 takes a plain fetcher function returning a dict
+        from weasyprint import default_url_fetcher
+
+        def fetch_asset(url, *args, **kwargs):
+            if not url.startswith(ASSET_SCHEME):
+                return default_url_fetcher(url, *args, **kwargs)
+            data, mime_type = read_asset(url[len(ASSET_SCHEME):])
+            return {'string': data, 'mime_type': mime_type, 'redirected_url': url}
+
+        return lambda: fetch_asset
+
+    class AssetURLFetcher(URLFetcher):
+        """Serve pdf-asset: URLs from the in-memory cache and defer everything else to WeasyPrint."""
+
+        def fetch(self, url, headers=None):
+            if not url.startswith(ASSET_SCHEME):
+                return super().fetch(url, headers)
+            data, mime_type = read_asset(url[len(ASSET_SCHEME):])
+            return URLFetcherResponse(url, data, {'Content-Type': mime_type})
+
+    return AssetURLFetcher
+
+
+def asset_url_fetcher():
+    return _fetcher_factory()()
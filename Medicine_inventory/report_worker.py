@@ -0,0 +1,17 @@
+"""
+Entry points for report worker processes.
+
+Pool processes are spawned fresh and unpickle these functions by reference
+before Django is set up, so this module must not import models at import time.
+"""
+import django
+
+
+def init_worker():
+    django.setup()
+
+
+def render_report(report_type, params):
+    """Render one report to PDF bytes inside a worker process."""
+    from .reports import REPORT_RENDERERS
+    return REPORT_RENDERERS[report_type](params)
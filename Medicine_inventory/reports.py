@@ -0,0 +1,69 @@
+from django.core.files.base import ContentFile
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from Non_Medicine_inventory.models import NonMedicalProduct
+from .models import Medicine, ReportJob
+
+REPORT_FILENAMES = {
+    'medicine': 'medicine_inventory.pdf',
+    'non_medical': 'non_medical_products.pdf',
+}
+
+
+def _render_pdf(template_name, context):
+    # WeasyPrint is imported only here, in the worker, so the views that queue
+    # reports load without it (and without pango)
+    from weasyprint import HTML
+    from .pdf_assets import LOGO_URL, asset_url_fetcher
+
+    html_string = render_to_string(template_name, {**context, 'logo_url': LOGO_URL})
+    return HTML(string=html_string, url_fetcher=asset_url_fetcher()).write_pdf()
+
+
+def render_medicine_report(params):
+    medicines = Medicine.objects.all()
+    context = {
+        'medicines': medicines,
+        'now': timezone.now(),
+        'total_medicines': medicines.count(),
+        'low_stock_count': medicines.low_stock().count(),
+        'expired': medicines.filter(expiry_date__lt=timezone.now().date()).count(),
+    }
+    return _render_pdf('Medicine_inventory/medicine_pdf.html', context)
+
+
+def render_non_medical_report(params):
+    products = NonMedicalProduct.objects.all()
+    if params.get('category'):
+        products = products.filter(category=params['category'])
+    if params.get('search'):
+        products = products.filter(name__icontains=params['search'])
+    context = {
+        'products': products,
+        'title': 'Non-Medical Products Report',
+        'now': timezone.now(),
+    }
+    return _render_pdf('Non_Medicine_inventory/pdf_template.html', context)
+
+
+REPORT_RENDERERS = {
+    'medicine': render_medicine_report,
+    'non_medical': render_non_medical_report,
+}
+
+
+def enqueue_report(report_type, params=None, user=None):
+    return ReportJob.objects.create(report_type=report_type, params=params or {}, requested_by=user)
+
+
+def complete_job(job, pdf=None, error=None):
+    """Store the rendered PDF under MEDIA_ROOT/reports/ (or the failure) on the job."""
+    if error is None:
+        job.file.save(f"{job.report_type}_{job.pk}.pdf", ContentFile(pdf), save=False)
+        job.status = 'done'
+    else:
+        job.status = 'failed'
+        job.error = error
+    job.finished_at = timezone.now()
+    job.save(update_fields=['file', 'status', 'error', 'finished_at'])
@@ -0,0 +1,59 @@
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from Non_Medicine_inventory.models import NonMedicalProduct
+from .audit import start_buffering, stop_buffering
+from .ledger import record_movement
+from .models import Medicine, StockMovement
+from .stats import invalidate_inventory_stats
+
+
+@receiver(post_save, sender=Medicine)
+@receiver(post_delete, sender=Medicine)
+@receiver(post_save, sender=NonMedicalProduct)
+@receiver(post_delete, sender=NonMedicalProduct)
+def invalidate_dashboard_stats(sender, **kwargs):
+    """Any change to either inventory makes the cached dashboard counts stale."""
+    invalidate_inventory_stats()
+
+
+def _stored_stock(medicine):
+    return Medicine.objects.filter(pk=medicine.pk).values_list('quantity_in_stock', flat=True).first() or 0
+
+
+@receiver(pre_save, sender=Medicine)
+def read_stock_before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Read from the database, not the instance: a form opened before a dispense
+    # still records the real change when it is saved. Saves limited to other
+    # fields (update_fields without quantity_in_stock) skip the extra SELECT.
+    if raw or (update_fields is not None and 'quantity_in_stock' not in update_fields):
+        instance._stock_before_save = None
+    else:
+        instance._stock_before_save = 0 if instance._state.adding else _stored_stock(instance)
+
+
+@receiver(post_save, sender=Medicine)
+def record_stock_edit(sender, instance, created, **kwargs):
+    """Inventory forms and the admin set quantity_in_stock directly; add the change to the ledger."""
+    before = getattr(instance, '_stock_before_save', None)
+    if before is not None:
+        reason = StockMovement.RECEIVED if created else StockMovement.ADJUSTED
+        record_movement(instance.pk, instance.quantity_in_stock - before, reason)
+
+
+@receiver(pre_delete, sender=Medicine)
+def record_stock_removal(sender, instance, **kwargs):
+    record_movement(instance.pk, -_stored_stock(instance), StockMovement.REMOVED)
+
+
+@receiver(request_started)
+def buffer_audit_log(sender, **kwargs):
+    start_buffering()
+
+
+@receiver(request_finished)
+def write_audit_log(sender, **kwargs):
+    # Runs once the response has been sent. A connection opened here is
+    # closed, if stale, by close_old_connections when the next request starts.
+    stop_buffering()
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from Non_Medicine_inventory.models import NonMedicalProduct
+from .models import Medicine
+from .versions import bump_version, get_version
+
+# The key embeds the date, so the date-based counts (near expiry / expired)
+# roll over at midnight without an explicit purge, and the inventory version
+# kept in the database, so a change made in one worker process retires the
+# counts cached by every other one.
+STATS_CACHE_KEY = 'inventory_stats:{date}:{version}'
+STATS_VERSION = 'inventory_stats'
+STATS_CACHE_TIMEOUT = 60 * 60
+NEAR_EXPIRY_DAYS = 30
+
+
+def _cache_key(today):
+    return STATS_CACHE_KEY.format(date=today.isoformat(), version=get_version(STATS_VERSION))
+
+
+def compute_inventory_stats(today=None):
+    """Dashboard statistics for both inventories, computed with one aggregate query per model."""
+    today = today or timezone.now().date()
+    expiry_threshold = today + timedelta(days=NEAR_EXPIRY_DAYS)
+
+    medicine = Medicine.objects.aggregate(
+        total=Count('id'),
+        # The stock columns rather than is_low_stock: SQLite never answers from an
+        # index holding a generated column, and these keep the count covered by
+        # medicine_expiry_stock_idx
+        low_stock=Count('id', filter=Q(quantity_in_stock__lt=F('reorder_level'))),
+        near_expiry=Count('id', filter=Q(expiry_date__gt=today, expiry_date__lte=expiry_threshold)),
+        expired=Count('id', filter=Q(expiry_date__lt=today)),
+    )
+    nonmedical = NonMedicalProduct.objects.aggregate(
+        total=Count('id'),
+        low_stock=Count('id', filter=Q(is_low_stock=True)),
+        active=Count('id', filter=Q(is_active=True)),
+        categories=Count('category', distinct=True),
+    )
+    category_data = Medicine.objects.values('category').annotate(count=Count('id')).order_by('-count')
+    nonmed_category_data = NonMedicalProduct.objects.values('category').annotate(count=Count('id')).order_by('-count')
+
+    return {
+        'total_medicines': medicine['total'],
+        'low_stock_count': medicine['low_stock'],
+        'near_expiry_count': medicine['near_expiry'],
+        'expired_count': medicine['expired'],
+        'total_nonmedical': nonmedical['total'],
+        'nonmedical_low_stock_count': nonmedical['low_stock'],
+        'nonmedical_active_count': nonmedical['active'],
+        'nonmedical_categories_count': nonmedical['categories'],
+        'category_labels': [item['category'] for item in category_data],
+        'category_counts': [item['count'] for item in category_data],
+        'nonmed_category_labels': [item['category'] for item in nonmed_category_data],
+        'nonmed_category_counts': [item['count'] for item in nonmed_category_data],
+    }
+
+
+def get_inventory_stats():
+    """Return today's cached dashboard statistics, computing them on a miss."""
+    today = timezone.now().date()
+    key = _cache_key(today)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_inventory_stats(today)
+        cache.set(key, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def _bump_stats_version():
+    bump_version(STATS_VERSION)
+
+
+def invalidate_inventory_stats():
+    """
+    Retire the cached counts once the current transaction commits. Doing it
+    earlier would let a dashboard request cache the pre-commit counts again
+    under the new version.
+    """
+    transaction.on_commit(_bump_stats_version)
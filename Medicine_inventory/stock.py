@@ -0,0 +1,199 @@
+"""
+Stock movements as single conditional UPDATEs.
+
+    UPDATE ... SET quantity_in_stock = quantity_in_stock - n
+    WHERE id = %s AND quantity_in_stock >= n
+
+The database checks and applies the change in one statement, so no row lock is
+held while Python decides, two counters can never take the same units, and
+only the stock column is written. QuerySet.update() sends no post_save, so the
+dashboard statistics are invalidated and the StockMovement ledger rows written
+here instead (see Medicine_inventory.ledger). `reference` names what the stock
+was moved for, e.g. "prescription:42".
+
+Each Medicine row is one batch. allocate_fefo() dispenses a medicine across
+its batches, first expiry first out; allocate_fefo_many() does the same for a
+whole list of medicines with one locking read and one UPDATE.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, Value, When
+
+from .ledger import record_movement, record_movements
+from .models import Medicine, StockMovement
+from .stats import invalidate_inventory_stats
+
+
+def take_stock(medicine_id, quantity, reference=''):
+    """Take exactly `quantity` units; returns False, changing nothing, if fewer are in stock."""
+    if quantity <= 0:
+        return True
+    with transaction.atomic():
+        taken = Medicine.objects.filter(pk=medicine_id, quantity_in_stock__gte=quantity).update(
+            quantity_in_stock=F('quantity_in_stock') - quantity
+        )
+        if taken:
+            record_movement(medicine_id, -quantity, StockMovement.DISPENSED, reference)
+    if taken:
+        invalidate_inventory_stats()
+    return bool(taken)
+
+
+def take_available_stock(medicine_id, quantity, reference=''):
+    """Take up to `quantity` units, as many as are in stock; returns how many were taken."""
+    while quantity > 0:
+        available = Medicine.objects.filter(pk=medicine_id).values_list('quantity_in_stock', flat=True).first()
+        if not available:
+            return 0
+        # Retry only if another counter took stock between the read and the update
+        if take_stock(medicine_id, min(available, quantity), reference):
+            return min(available, quantity)
+    return 0
+
+
+def return_stock(medicine_id, quantity, reference=''):
+    """Put `quantity` units back into stock."""
+    if quantity <= 0:
+        return
+    with transaction.atomic():
+        if Medicine.objects.filter(pk=medicine_id).update(quantity_in_stock=F('quantity_in_stock') + quantity):
+            record_movement(medicine_id, quantity, StockMovement.RETURNED, reference)
+    invalidate_inventory_stats()
+
+
+class InsufficientStock(Exception):
+    def __init__(self, available):
+        super().__init__(f'Only {available} units in stock.')
+        self.available = available
+
+
+def fefo_batches(name, dosage, today=None):
+    """Unexpired batches of a medicine that have stock, first to expire first (medicine_fefo_idx)."""
+    today = today or date.today()
+    return Medicine.objects.filter(
+        name=name, dosage=dosage, expiry_date__gt=today, quantity_in_stock__gt=0,
+    ).order_by('expiry_date', 'pk')
+
+
+def allocate_fefo(name, dosage, quantity, partial=False, today=None, reference=''):
+    """
+    Take `quantity` units of a medicine from its unexpired batches, earliest
+    expiry first. Returns [(batch, units taken)].
+
+    If the batches hold fewer units in total, raises InsufficientStock and takes
+    nothing, unless `partial` is true, in which case everything left is taken.
+    """
+    allocations = []
+    remaining = quantity
+    with transaction.atomic():
+        for batch in fefo_batches(name, dosage, today):
+            if remaining <= 0:
+                break
+            wanted = min(batch.quantity_in_stock, remaining)
+            # The level read with the batch can be stale; fall back to what is there now
+            taken = (
+                wanted if take_stock(batch.pk, wanted, reference)
+                else take_available_stock(batch.pk, wanted, reference)
+            )
+            if taken:
+                allocations.append((batch, taken))
+                remaining -= taken
+        if remaining > 0 and not partial:
+            raise InsufficientStock(quantity - remaining)
+    return allocations
+
+
+class StockShortage(Exception):
+    """Raised by allocate_fefo_many; `shortages` is [(demand index, units available)]."""
+
+    def __init__(self, shortages):
+        super().__init__(f'{len(shortages)} medicine(s) short of stock.')
+        self.shortages = shortages
+
+
+class StockChanged(Exception):
+    """Stock kept changing between the read and the update; the caller may retry."""
+
+
+# Attempts before giving up when stock keeps changing under an unlocked read
+# (databases such as SQLite ignore select_for_update)
+ALLOCATION_ATTEMPTS = 3
+
+
+def _allocate(demands, today):
+    condition = Q()
+    for name, dosage in {(name, dosage) for name, dosage, _ in demands}:
+        condition |= Q(name=name, dosage=dosage)
+    # Lock every candidate batch in primary key order, the same order for every
+    # request, so two counters dispensing overlapping medicines cannot deadlock.
+    batches = list(
+        Medicine.objects.select_for_update()
+        .filter(condition, expiry_date__gt=today, quantity_in_stock__gt=0)
+        .order_by('pk')
+    )
+    by_medicine = defaultdict(list)
+    for batch in sorted(batches, key=lambda batch: (batch.expiry_date, batch.pk)):
+        by_medicine[batch.name, batch.dosage].append(batch)
+
+    left = {batch.pk: batch.quantity_in_stock for batch in batches}
+    allocations, shortages = [], []
+    for index, (name, dosage, quantity) in enumerate(demands):
+        allocation, remaining = [], quantity
+        for batch in by_medicine[name, dosage]:
+            taken = min(left[batch.pk], remaining)
+            if taken:
+                left[batch.pk] -= taken
+                remaining -= taken
+                allocation.append((batch, taken))
+        if remaining:
+            shortages.append((index, quantity - remaining))
+        allocations.append(allocation)
+    return allocations, shortages
+
+
+def _apply(allocations, reference):
+    """Take every allocated unit with one conditional UPDATE, and record it with one INSERT."""
+    totals = defaultdict(int)
+    for allocation in allocations:
+        for batch, taken in allocation:
+            totals[batch.pk] += taken
+    if not totals:
+        return
+    enough = Q()
+    for pk, taken in totals.items():
+        enough |= Q(pk=pk, quantity_in_stock__gte=taken)
+    updated = Medicine.objects.filter(enough).update(
+        quantity_in_stock=F('quantity_in_stock') - Case(
+            *[When(pk=pk, then=Value(taken)) for pk, taken in totals.items()],
+            output_field=PositiveIntegerField(),
+        )
+    )
+    if updated != len(totals):
+        raise StockChanged
+    record_movements([(pk, -taken) for pk, taken in totals.items()], StockMovement.DISPENSED, reference)
+    invalidate_inventory_stats()
+
+
+def allocate_fefo_many(demands, partial=False, today=None, reference=''):
+    """
+    Dispense several medicines at once. `demands` is [(name, dosage, quantity)];
+    returns one [(batch, units taken)] list per demand, filled first expiry
+    first out as in allocate_fefo().
+
+    If any demand cannot be met, raises StockShortage and takes nothing, unless
+    `partial` is true, in which case short demands get what is left.
+    """
+    today = today or date.today()
+    for attempt in range(ALLOCATION_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                allocations, shortages = _allocate(demands, today)
+                if shortages and not partial:
+                    raise StockShortage(shortages)
+                _apply(allocations, reference)
+                return allocations
+        except StockChanged:
+            if attempt == ALLOCATION_ATTEMPTS - 1:
+                raise
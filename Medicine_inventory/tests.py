@@ -1,5 +1,41 @@
-from django.test import TestCase
-from .models import Medicine
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from Non_Medicine_inventory.models import NonMedicalProduct, NonMedicalProductAction
+from .audit import buffered, record_action
+from .ledger import stock_at, stock_levels_at, take_snapshot
+from .models import Medicine, MedicineAction, ReportJob, StockMovement
+from .pagination import _seek, encode_cursor, keyset_paginate
+from .pdf_assets import ASSET_SCHEME, asset_url_fetcher, clear_assets, read_asset, stylesheet
+from .stats import compute_inventory_stats, get_inventory_stats
+from .stock import return_stock, take_stock
+
+
+def make_medicine(batch_number, **fields):
+    """Create a Medicine batch with test defaults; pass only the fields a test cares about."""
+    today = date.today()
+    defaults = {
+        "name": batch_number, "brand": "Sanofi", "category": "Analgesic", "dosage": "100mg",
+        "quantity_in_stock": 50, "reorder_level": 10, "manufacture_date": today - timedelta(days=30),
+        "expiry_date": today + timedelta(days=365), "supplier": "Cardinal",
+    }
+    return Medicine.objects.create(batch_number=batch_number, **{**defaults, **fields})
+
 
 class MedicineModelTest(TestCase):
     def test_create_medicine(self):
@@ -9,7 +45,7 @@ class MedicineModelTest(TestCase):
             category="Painkiller",
             description="Pain relief",
             dosage="100mg",
-            price=100,
+            selling_price=100,
             quantity_in_stock=50,
             reorder_level=10,
             manufacture_date="2025-01-01",
@@ -17,4 +53,477 @@ class MedicineModelTest(TestCase):
             supplier="Cardinal",
             batch_number="ASPIR-20250101-CARDINAL-008"
         )
-        self.assertEqual(medicine.name, "Aspirin")
\ No newline at end of file
+        self.assertEqual(medicine.name, "Aspirin")
+
+
+class MedicineQuerySetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+
+        def make(batch, quantity, expiry_in_days):
+            return make_medicine(batch, quantity_in_stock=quantity, expiry_date=today + timedelta(days=expiry_in_days))
+
+        cls.expired = make("EXPIRED", 50, 0)
+        cls.near = make("NEAR", 50, 7)
+        cls.low = make("LOW", 5, 365)
+        cls.ok = make("OK", 50, 8)
+
+    def test_filters_match_model_methods(self):
+        for med in Medicine.objects.all():
+            self.assertEqual(Medicine.objects.expired().filter(pk=med.pk).exists(), med.is_expired())
+            self.assertEqual(Medicine.objects.near_expiry().filter(pk=med.pk).exists(), bool(med.is_near_expiry()))
+        self.assertQuerySetEqual(Medicine.objects.low_stock(), [self.low])
+
+    def test_with_status_annotates_flags(self):
+        flags = {
+            med.batch_number: (med.expired, med.near_expiry, med.low_stock)
+            for med in Medicine.objects.with_status()
+        }
+        self.assertEqual(flags["EXPIRED"], (True, False, False))
+        self.assertEqual(flags["NEAR"], (False, True, False))
+        self.assertEqual(flags["LOW"], (False, False, True))
+        self.assertEqual(flags["OK"], (False, False, False))
+
+    def test_low_stock_flag_follows_updates(self):
+        Medicine.objects.filter(pk=self.ok.pk).update(quantity_in_stock=F("quantity_in_stock") - 45)
+        self.assertQuerySetEqual(Medicine.objects.low_stock().order_by("name"), [self.low, self.ok])
+        self.ok.refresh_from_db(fields=["is_low_stock"])
+        self.assertTrue(self.ok.is_low_stock)
+
+    def test_low_stock_flag_is_read_again_after_save(self):
+        self.assertFalse(self.ok.is_low_stock)
+        self.ok.quantity_in_stock = 1
+        self.ok.save()
+        self.assertTrue(self.ok.is_low_stock)
+
+    def test_apply_filters_combines_in_one_query(self):
+        with self.assertNumQueries(1):
+            result = list(Medicine.objects.apply_filters(category="Analgesic", expiry="near").with_status())
+        self.assertEqual(result, [self.near])
+
+
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        for i in range(7):
+            make_medicine(f"BATCH-{i}", name=f"Med {i % 3}", quantity_in_stock=i % 2,
+                          expiry_date=today + timedelta(days=30))
+
+    def _walk(self, sort_field, descending):
+        pages, after = [], None
+        while True:
+            page = keyset_paginate(Medicine.objects.all(), sort_field, descending, after=after, page_size=3)
+            pages.append(page)
+            if not page.has_next:
+                return pages
+            after = page.next_cursor
+
+    def test_pages_follow_full_ordering_without_gaps(self):
+        for sort_field in ("name", "quantity_in_stock"):
+            for descending in (False, True):
+                prefix = "-" if descending else ""
+                expected = list(Medicine.objects.order_by(f"{prefix}{sort_field}", f"{prefix}pk"))
+                pages = self._walk(sort_field, descending)
+                self.assertEqual([m for page in pages for m in page], expected)
+                self.assertFalse(pages[0].has_previous)
+
+    def test_before_cursor_returns_previous_page(self):
+        first, second = self._walk("name", False)[:2]
+        previous = keyset_paginate(Medicine.objects.all(), "name", before=second.previous_cursor, page_size=3)
+        self.assertEqual(list(previous), list(first))
+        self.assertFalse(previous.has_previous)
+
+    def test_cursor_that_does_not_fit_the_sort_serves_first_page(self):
+        first = list(keyset_paginate(Medicine.objects.all(), "quantity_in_stock", page_size=3))
+        name_cursor = self._walk("name", False)[0].next_cursor
+        for cursor in (name_cursor, encode_cursor(None, 1), encode_cursor(["x"], 1), "not-a-cursor"):
+            page = keyset_paginate(Medicine.objects.all(), "quantity_in_stock", after=cursor, page_size=3)
+            self.assertEqual(list(page), first)
+            self.assertFalse(page.has_previous)
+
+    def test_page_costs_one_query(self):
+        cursor = self._walk("name", False)[1].next_cursor
+        with self.assertNumQueries(1):
+            keyset_paginate(Medicine.objects.with_status(), "name", after=cursor, page_size=3)
+
+
+@skipUnless(connection.vendor == 'sqlite', "plans are checked against SQLite's EXPLAIN QUERY PLAN")
+class QueryPlanTest(TestCase):
+    """The inventory pages and dashboard are answered from the Medicine indexes."""
+
+    def assertUsesIndex(self, queryset, index, sort=False):
+        plan = queryset.explain()
+        self.assertIn(f'INDEX {index}', plan)
+        if not sort:
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def plans(self, func):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans.append(' '.join(str(row[-1]) for row in cursor.fetchall()))
+        return plans
+
+    def test_table_filters_and_sorts(self):
+        medicines = Medicine.objects.with_status()
+        after = _seek('name', 'M', 1, greater=True)
+        self.assertUsesIndex(medicines.filter(category='Analgesic').filter(after).order_by('name', 'pk')[:24],
+                             'medicine_category_name_idx')
+        self.assertUsesIndex(medicines.low_stock().filter(after).order_by('name', 'pk')[:24], 'medicine_low_stock_idx')
+        self.assertUsesIndex(NonMedicalProduct.objects.filter(is_low_stock=True), 'nonmedical_low_stock_idx')
+        after = _seek('timestamp', timezone.now(), 1, greater=False)
+        self.assertUsesIndex(MedicineAction.objects.filter(after).order_by('-timestamp', '-pk')[:11],
+                             'medicine_action_time_idx')
+        self.assertUsesIndex(medicines.order_by('-quantity_in_stock', '-pk')[:24], 'medicine_stock_idx')
+        self.assertUsesIndex(medicines.near_expiry().order_by('name', 'pk')[:24], 'medicine_expiry_stock_idx', sort=True)
+        self.assertUsesIndex(medicines.expired().order_by('name', 'pk')[:24], 'medicine_expiry_stock_idx', sort=True)
+
+    def test_dashboard_queries(self):
+        self.assertUsesIndex(Medicine.objects.order_by('-manufacture_date')[:5], 'medicine_manufacture_idx')
+        totals, _, categories, _ = self.plans(compute_inventory_stats)
+        self.assertIn('COVERING INDEX medicine_expiry_stock_idx', totals)
+        self.assertIn('COVERING INDEX medicine_category_name_idx', categories)
+
+class InventoryStatsCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _create(self, batch, quantity):
+        return make_medicine(batch, quantity_in_stock=quantity)
+
+    def test_second_read_is_served_from_cache(self):
+        self._create("A", 50)
+        get_inventory_stats()
+        # Only the version lookup
+        with self.assertNumQueries(1):
+            stats = get_inventory_stats()
+        self.assertEqual(stats["total_medicines"], 1)
+
+    def test_saves_and_deletes_invalidate(self):
+        medicine = self._create("A", 50)
+        self.assertEqual(get_inventory_stats()["low_stock_count"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            medicine.quantity_in_stock = 1
+            medicine.save()
+        self.assertEqual(get_inventory_stats()["low_stock_count"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            NonMedicalProduct.objects.create(brand="Acme", name="Soap", category="Other", stock=1)
+        self.assertEqual(get_inventory_stats()["nonmedical_low_stock_count"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            medicine.delete()
+        self.assertEqual(get_inventory_stats()["total_medicines"], 0)
+
+    def test_counts_are_retired_on_commit_in_every_process(self):
+        medicine = self._create("A", 50)
+        self.assertEqual(get_inventory_stats()["low_stock_count"], 0)
+        # Another worker, with its own cache, dispenses
+        with self.captureOnCommitCallbacks() as callbacks:
+            with override_settings(CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "other-process",
+            }}):
+                take_stock(medicine.pk, 45)
+        # Nothing is retired before the commit
+        self.assertEqual(get_inventory_stats()["low_stock_count"], 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_inventory_stats()["low_stock_count"], 1)
+
+
+class MedicineCsvExportTest(TestCase):
+    def test_export_streams_all_rows(self):
+        today = date.today()
+        for i in range(3):
+            make_medicine(f"BATCH-{i}", name=f"Med {i}", quantity_in_stock=5, expiry_date=today + timedelta(days=30))
+        self.client.force_login(User.objects.create_user("pharmacist", password="x", role="pharmacist"))
+        response = self.client.get(reverse("export_medicine_csv"))
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith("Med 0,Sanofi,Analgesic"))
+
+
+class ReportJobQueueTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.force_login(User.objects.create_user("pharmacist", password="x", role="pharmacist"))
+
+    def test_export_queues_and_worker_renders(self):
+        response = self.client.get(reverse("export_medicine_pdf"))
+        job = ReportJob.objects.get()
+        self.assertRedirects(response, reverse("report_status", args=[job.pk]))
+        self.assertEqual(job.status, "pending")
+
+        call_command("process_report_jobs", workers=0, once=True, stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        status = self.client.get(reverse("report_status", args=[job.pk]), {"format": "json"}).json()
+        self.assertEqual(status["download_url"], reverse("report_download", args=[job.pk]))
+        download = self.client.get(status["download_url"])
+        self.assertEqual(download["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(download.streaming_content).startswith(b"%PDF"))
+
+    def test_stale_running_job_is_requeued_while_polling(self):
+        job = ReportJob.objects.create(report_type="medicine", status="running",
+                                       started_at=timezone.now() - timedelta(hours=2))
+        call_command("process_report_jobs", workers=0, once=True, stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+
+    def test_dead_worker_fails_its_job_and_the_pool_is_rebuilt(self):
+        first = ReportJob.objects.create(report_type="medicine")
+        second = ReportJob.objects.create(report_type="medicine")
+        pools = []
+
+        class BrokenOncePool:
+            """Stands in for ProcessPoolExecutor: the first pool loses its worker, later ones render inline."""
+            def __init__(self, *args, **kwargs):
+                pools.append(self)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                return False
+
+            def submit(self, fn, *args):
+                future = Future()
+                if len(pools) == 1:
+                    future.set_exception(BrokenProcessPool("worker died"))
+                else:
+                    future.set_result(fn(*args))
+                return future
+
+        with mock.patch("Medicine_inventory.management.commands.process_report_jobs.ProcessPoolExecutor",
+                        BrokenOncePool):
+            call_command("process_report_jobs", workers=1, once=True, stdout=io.StringIO())
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, second.status), ("failed", "done"))
+        self.assertEqual(len(pools), 2)
+
+
+class PdfAssetCacheTest(TestCase):
+    def setUp(self):
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir, ignore_errors=True)
+        os.makedirs(os.path.join(base_dir, "static"))
+        self.path = os.path.join(base_dir, "static", "logo.png")
+        with open(self.path, "wb") as f:
+            f.write(b"v1")
+        override = override_settings(BASE_DIR=base_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        clear_assets()
+
+    def test_asset_is_reread_only_when_mtime_changes(self):
+        first, mime_type = read_asset("logo.png")
+        self.assertEqual((first, mime_type), (b"v1", "image/png"))
+        self.assertIs(read_asset("logo.png")[0], first)
+
+        with open(self.path, "wb") as f:
+            f.write(b"v2")
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(read_asset("logo.png")[0], b"v2")
+
+    def test_paths_outside_static_are_rejected(self):
+        with self.assertRaises(ValueError):
+            read_asset("../secrets.txt")
+
+    def test_fetcher_serves_assets_from_memory(self):
+        response = asset_url_fetcher()(ASSET_SCHEME + "logo.png")
+        # WeasyPrint >= 68 returns a URLFetcherResponse, older releases a dict.
+        data = response["string"] if isinstance(response, dict) else response.read()
+        self.assertEqual(data, b"v1")
+
+    def test_stylesheet_is_parsed_once_per_version(self):
+        css_path = os.path.join(os.path.dirname(self.path), "report.css")
+        with open(css_path, "w") as f:
+            f.write("body { color: black; }")
+        first = stylesheet("report.css")
+        self.assertIs(stylesheet("report.css"), first)
+
+        with open(css_path, "w") as f:
+            f.write("body { color: red; }")
+        stat = os.stat(css_path)
+        os.utime(css_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNot(stylesheet("report.css"), first)
+
+
+class StockLedgerTest(TestCase):
+    def setUp(self):
+        self.medicine = make_medicine("LEDGER-1", name="Panadol", brand="GSK", dosage="500mg", quantity_in_stock=100)
+
+    def movements(self):
+        return list(StockMovement.objects.filter(medicine_id=self.medicine.pk)
+                    .order_by("pk").values_list("reason", "delta", "reference"))
+
+    def test_every_stock_change_is_recorded(self):
+        take_stock(self.medicine.pk, 30, reference="prescription:1")
+        return_stock(self.medicine.pk, 5, reference="prescription:1")
+        self.medicine.refresh_from_db()
+        self.medicine.quantity_in_stock += 20
+        self.medicine.save()
+        # A stale copy saved after a dispense leaves the dispensed stock alone
+        stale = Medicine.objects.get(pk=self.medicine.pk)
+        take_stock(self.medicine.pk, 10)
+        stale.supplier = "Hemas"
+        stale.save()
+        self.assertEqual(Medicine.objects.get(pk=self.medicine.pk).quantity_in_stock, 85)
+        Medicine.objects.get(pk=self.medicine.pk).delete()
+
+        self.assertEqual(self.movements(), [
+            (StockMovement.RECEIVED, 100, ""),
+            (StockMovement.DISPENSED, -30, "prescription:1"),
+            (StockMovement.RETURNED, 5, "prescription:1"),
+            (StockMovement.ADJUSTED, 20, ""),
+            (StockMovement.DISPENSED, -10, ""),
+            (StockMovement.REMOVED, -85, ""),
+        ])
+
+    def test_edit_form_opened_before_a_dispense_keeps_it(self):
+        self.client.force_login(User.objects.create_user("pharmacist", password="x", role="pharmacist"))
+        url = reverse("medicine_update", args=[self.medicine.pk])
+        form = self.client.get(url).context["form"]
+        data = {
+            name: value for name, value in form.initial.items()
+            if name not in ("image", "id") and value is not None
+        }
+        data.update(med_code="PAN", batch_date="20260101", supplier_code="GSK", seq="001", supplier="Hemas")
+        data["initial-quantity_in_stock"] = data["quantity_in_stock"]
+        take_stock(self.medicine.pk, 10)
+
+        response = self.client.post(url, data)
+        self.assertRedirects(response, reverse("medicine_table"), fetch_redirect_response=False)
+        self.medicine.refresh_from_db()
+        self.assertEqual((self.medicine.supplier, self.medicine.quantity_in_stock), ("Hemas", 90))
+
+        # A stock count the user typed in is still applied, and recorded as the real change
+        data.update(quantity_in_stock=120)
+        self.client.post(url, data)
+        self.medicine.refresh_from_db()
+        self.assertEqual(self.medicine.quantity_in_stock, 120)
+        self.assertEqual(self.movements()[-1], (StockMovement.ADJUSTED, 30, ""))
+
+    def test_saves_that_leave_stock_alone_skip_the_stock_lookup(self):
+        self.medicine.supplier = "Hemas"
+        with self.assertNumQueries(1):
+            self.medicine.save(update_fields=["supplier"])
+        self.assertEqual(len(self.movements()), 1)
+
+    def test_stock_at_reads_the_latest_snapshot_and_later_movements(self):
+        take_stock(self.medicine.pk, 30)
+        before_snapshot = timezone.now()
+        self.assertEqual(take_snapshot(before_snapshot), 1)
+        self.assertIsNone(take_snapshot(before_snapshot))
+        # Rewrite history behind the snapshot: it is no longer replayed
+        StockMovement.objects.filter(created_at__lte=before_snapshot).update(delta=0)
+        take_stock(self.medicine.pk, 20)
+        after = timezone.now()
+        take_stock(self.medicine.pk, 50)
+
+        self.assertEqual(stock_at(self.medicine.pk, before_snapshot), 70)
+        self.assertEqual(stock_at(self.medicine.pk, after), 50)
+        self.assertEqual(stock_levels_at(timezone.now()), {})
+        with self.assertRaises(ValueError):
+            take_snapshot(timezone.now() + timedelta(days=1))
+
+
+class AuditBufferTest(TestCase):
+    def test_buffered_rows_are_written_together(self):
+        # One INSERT per model, when the block ends (each in a savepoint)
+        with CaptureQueriesContext(connection) as queries, buffered():
+            record_action(MedicineAction(medicine_name="Panadol", batch_number="B-1", action="delete"))
+            record_action(MedicineAction(medicine_name="Amoxil", batch_number="B-2", action="delete"))
+            record_action(NonMedicalProductAction(product_name="Soap", action="deleted"))
+            self.assertEqual(len(queries), 0)
+        inserts = [query["sql"] for query in queries.captured_queries if query["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(MedicineAction.objects.count(), 2)
+        self.assertEqual(NonMedicalProductAction.objects.count(), 1)
+
+    def test_request_actions_are_written_after_the_response(self):
+        user = User.objects.create_user("pharmacist", password="x", role="pharmacist")
+        self.client.force_login(user)
+        product = NonMedicalProduct.objects.create(brand="Acme", name="Soap", category="Other", stock=10)
+        response = self.client.post(reverse("non_medicine:product_delete", args=[product.slug]))
+        self.assertEqual(response.status_code, 302)
+        action = NonMedicalProductAction.objects.get()
+        self.assertEqual((action.product_name, action.action, action.user), ("Soap", "deleted", user))
+
+    def test_failed_bulk_write_falls_back_to_single_rows(self):
+        save = MedicineAction.save
+
+        def save_all_but_one(entry, *args, **kwargs):
+            if entry.batch_number == "B-2":
+                raise DatabaseError("disk full")
+            return save(entry, *args, **kwargs)
+
+        with (
+            mock.patch.object(MedicineAction.objects, "bulk_create", side_effect=DatabaseError("locked")),
+            mock.patch.object(MedicineAction, "save", save_all_but_one),
+            self.assertLogs("Medicine_inventory.audit") as logs,
+            buffered(),
+        ):
+            for batch in ("B-1", "B-2", "B-3"):
+                record_action(MedicineAction(medicine_name="Panadol", batch_number=batch, action="delete"))
+
+        self.assertEqual(sorted(MedicineAction.objects.values_list("batch_number", flat=True)), ["B-1", "B-3"])
+        self.assertIn("1 of 3 MedicineAction audit rows were lost.", logs.output[-1])
+
+
+class ActionFeedTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("pharmacist", password="x", role="pharmacist"))
+        start = timezone.now() - timedelta(hours=1)
+        MedicineAction.objects.bulk_create([
+            MedicineAction(medicine_name=f"Med {i}", batch_number=f"B-{i}", action="delete",
+                           timestamp=start + timedelta(minutes=i))
+            for i in range(12)
+        ])
+
+    def feed(self, **params):
+        return self.client.get(reverse("medicine_actions_json"), params).json()
+
+    def test_feed_pages_newest_first_without_counting(self):
+        with CaptureQueriesContext(connection) as queries:
+            first = self.feed()
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+        self.assertEqual([row["medicine_name"] for row in first["results"][:2]], ["Med 11", "Med 10"])
+        second = self.feed(after=first["next_cursor"])
+        self.assertEqual([row["medicine_name"] for row in second["results"]], ["Med 1", "Med 0"])
+        self.assertIsNone(second["next_cursor"])
+
+    def test_cursor_from_another_sort_serves_first_page(self):
+        first = self.feed()["results"]
+        self.assertEqual(self.feed(after=encode_cursor("Med 3", 4))["results"], first)
+
+    def test_polling_follows_write_order_not_timestamps(self):
+        last_id = self.client.get(reverse("med_inventory_dash")).context["last_action_id"]
+        self.assertEqual(self.feed(since=last_id)["results"], [])
+        # Written late by a buffered request: older than the newest action shown, still picked up
+        MedicineAction.objects.create(medicine_name="Late", batch_number="B-98", action="add",
+                                      timestamp=timezone.now() - timedelta(hours=2))
+        MedicineAction.objects.create(medicine_name="Fresh", batch_number="B-99", action="add")
+        update = self.feed(since=last_id)
+        self.assertEqual([row["medicine_name"] for row in update["results"]], ["Late", "Fresh"])
+        self.assertEqual(self.feed(since=update["last_id"])["results"], [])
+
+    def test_dashboard_pages_the_log_by_cursor(self):
+        response = self.client.get(reverse("med_inventory_dash"))
+        self.assertEqual(len(response.context["recent_actions"]), 10)
+        self.assertContains(response, "data-last-id=")
+        older = self.client.get(reverse("med_inventory_dash"), {"after": response.context["recent_actions"].next_cursor})
+        self.assertEqual(len(older.context["recent_actions"]), 2)
+        self.assertNotContains(older, "data-last-id=")
@@ -14,11 +14,15 @@ urlpatterns = [
     path('', views.med_inventory_dash, name='med_inventory_dash'),
     path('medicine/cards/', views.view_medicine_cards, name='medicine_cards'),
     path('medicine/table/', views.view_medicine_table, name='medicine_table'),
+    path('medicine/table/json/', views.medicine_table_json, name='medicine_table_json'),
+    path('actions/json/', views.medicine_actions_json, name='medicine_actions_json'),
     path('create/', views.create_medicine, name='medicine_create'),
     path('update/<int:id>/', views.update_medicine, name='medicine_update'),
     path('delete/<int:id>/', views.delete_medicine, name='medicine_delete'),
     path('export/csv/', views.export_medicine_csv, name='export_medicine_csv'),
     path('export/pdf/', views.export_medicine_pdf, name='export_medicine_pdf'),
+    path('reports/<int:pk>/', views.report_status, name='report_status'),
+    path('reports/<int:pk>/download/', views.report_download, name='report_download'),
     # Remove this line: path('accounts/', include('accounts.urls')),
 ]
 
@@ -0,0 +1,25 @@
+"""
+Versions of per-process caches, kept in the database.
+
+Each process caches data such as the interaction index and the dashboard
+counts in its own memory. A writer calls bump_version(); readers compare
+get_version() with the version their copy was built from. That costs one
+primary-key lookup and works without a shared cache backend. Bumped inside a
+transaction, the new version becomes visible together with the data.
+"""
+from django.db.models import F
+
+from .models import CacheVersion
+
+
+def get_version(name):
+    return CacheVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+
+def bump_version(name):
+    if CacheVersion.objects.filter(name=name).update(version=F('version') + 1):
+        return
+    _, created = CacheVersion.objects.get_or_create(name=name, defaults={'version': 1})
+    if not created:
+        # Another process created the row first
+        CacheVersion.objects.filter(name=name).update(version=F('version') + 1)
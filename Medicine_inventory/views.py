@@ -1,24 +1,16 @@
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Medicine, MedicineAction
+from .models import Medicine, MedicineAction, ReportJob
+from .audit import record_action
 from .forms import MedicineForm
-import csv
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from django.http import HttpResponse
-from weasyprint import HTML
-from datetime import datetime
-from django.db import IntegrityError
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from Non_Medicine_inventory.models import NonMedicalProduct
-from django.db.models import Count, F
-import os
-from django.conf import settings
-from django.utils import timezone
-import base64
-from django.contrib.auth.decorators import login_required
-from django.db.models import F
-from Non_Medicine_inventory.models import NonMedicalProduct
+from .pagination import keyset_paginate
+from .stats import get_inventory_stats
+from .exports import EXPORT_CHUNK_SIZE, streaming_csv_response
+from .reports import REPORT_FILENAMES, enqueue_report
+from django.http import FileResponse, JsonResponse
+from django.urls import reverse
+from django.db.models import Max
+from django.utils import dateformat, timezone
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
@@ -32,117 +24,152 @@ def pharmacist_required(view_func):
     return user_passes_test(lambda u: u.is_authenticated and u.role == "pharmacist")(view_func)
 
 
+MEDICINES_PER_PAGE = 24
+SORTABLE_FIELDS = ['name', 'quantity_in_stock']
+MEDICINE_JSON_FIELDS = [
+    'id', 'name', 'brand', 'category', 'medicine_type', 'dosage', 'batch_number',
+    'cost_price', 'selling_price', 'quantity_in_stock', 'expiry_date', 'image',
+    'low_stock', 'near_expiry', 'expired',
+]
+
+
+def _filtered_medicines(request, medicines=None):
+    """Apply the shared category / expiry / low_stock filters and status flags in SQL."""
+    medicines = Medicine.objects.all() if medicines is None else medicines
+    return medicines.apply_filters(
+        category=request.GET.get('category'),
+        expiry=request.GET.get('expiry'),
+        low_stock=request.GET.get('low_stock'),
+    ).with_status()
+
+
+def _sort_params(request):
+    sort_by = request.GET.get('sort', 'name') # Default sort by name
+    direction = request.GET.get('dir', 'asc') # Default direction ascending
+    if sort_by not in SORTABLE_FIELDS: # Whitelist sortable fields
+        sort_by = 'name'
+    return sort_by, direction
+
+
+def _searched_medicines(request):
+    medicines = Medicine.objects.all()
+    search_query = request.GET.get('search')
+    if search_query:
+        medicines = medicines.filter(name__icontains=search_query)
+    return medicines
+
+
+def _medicine_page(request, medicines, sort_by='name', direction='asc', fields=None):
+    """Keyset page of filtered medicines ordered by (sort_by, id), driven by ?after= / ?before= cursors."""
+    medicines = _filtered_medicines(request, medicines)
+    if fields:
+        medicines = medicines.values(*fields)
+    return keyset_paginate(
+        medicines,
+        sort_by,
+        descending=direction != 'asc',
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        page_size=MEDICINES_PER_PAGE,
+    )
+
+
+ACTIONS_PER_PAGE = 10
+RECENT_ACTIONS = 5
+# Polling interval of the live action log on the dashboard
+ACTION_FEED_REFRESH_MS = 30000
+
+
+def _action_page(after=None, before=None, page_size=ACTIONS_PER_PAGE):
+    """Keyset page of the action log, newest first; read from medicine_action_time_idx, never counted."""
+    return keyset_paginate(
+        MedicineAction.objects.select_related('medicine', 'user'),
+        'timestamp',
+        descending=True,
+        after=after,
+        before=before,
+        page_size=page_size,
+    )
+
+
+def _last_action_id():
+    return MedicineAction.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+
+def _actions_since(last_id, limit=ACTIONS_PER_PAGE):
+    """
+    Actions written after the one with id `last_id`, in the order they were written.
+
+    The live log follows ids, not timestamps: a buffered row (Medicine_inventory.audit)
+    keeps the time its action happened but is only written when its request ends,
+    possibly after a later action has already been shown.
+    """
+    return list(
+        MedicineAction.objects.select_related('medicine', 'user').filter(pk__gt=last_id).order_by('pk')[:limit]
+    )
+
+
+def _action_json(action):
+    medicine = action.medicine
+    return {
+        'id': action.pk,
+        'medicine_name': medicine.name if medicine else action.medicine_name,
+        'batch_number': medicine.batch_number if medicine else action.batch_number,
+        'action': action.get_action_display(),
+        'user': action.user.username if action.user else None,
+        'timestamp': action.timestamp.isoformat(),
+        'timestamp_display': dateformat.format(timezone.localtime(action.timestamp), 'F j, Y, h:i A'),
+    }
+
+
+def _querystring_without_cursor(request):
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    return query.urlencode()
+
+
 # View all medicines
 @pharmacist_required
 def view_medicine(request):
-    medicines = Medicine.objects.all()
     categories = [c[0] for c in Medicine.CATEGORY_CHOICES]
-
-    # Filtering
-    category = request.GET.get('category')
-    expiry = request.GET.get('expiry')
-    low_stock = request.GET.get('low_stock')
-
-    if category:
-        medicines = medicines.filter(category=category)
-    filtered = []
-    for med in medicines:
-        med.low_stock = med.quantity_in_stock < med.reorder_level
-        med.near_expiry = med.is_near_expiry()
-        med.is_expired = med.is_expired()
-        if expiry == 'near' and not med.near_expiry:
-            continue
-        if expiry == 'expired' and not med.is_expired:
-            continue
-        if low_stock == 'low' and not med.low_stock:
-            continue
-        filtered.append(med)
+    page_obj = _medicine_page(request, Medicine.objects.all())
     return render(request, 'Medicine_inventory/view_medicine.html', {
-        'medicine': filtered,
+        'medicine': page_obj.object_list,
+        'page_obj': page_obj,
+        'querystring': _querystring_without_cursor(request),
         'categories': categories,
     })
 
 @pharmacist_required
 def view_medicine_cards(request):
-    medicines = Medicine.objects.all()
     categories = [c[0] for c in Medicine.CATEGORY_CHOICES]
+    page_obj = _medicine_page(request, Medicine.objects.all())
 
-    # Filtering
-    category = request.GET.get('category')
-    expiry = request.GET.get('expiry')
-    low_stock = request.GET.get('low_stock')
-
-    if category:
-        medicines = medicines.filter(category=category)
-    filtered = []
-    for med in medicines:
-        med.low_stock = med.quantity_in_stock < med.reorder_level
-        med.near_expiry = med.is_near_expiry()
-        med.is_expired = med.is_expired()
-        if expiry == 'near' and not med.near_expiry:
-            continue
-        if expiry == 'expired' and not med.is_expired:
-            continue
-        if low_stock == 'low' and not med.low_stock:
-            continue
-        filtered.append(med)
-
-    recent_actions = MedicineAction.objects.select_related('medicine').order_by('-timestamp')[:5]
+    recent_actions = _action_page(page_size=RECENT_ACTIONS)
     return render(request, 'Medicine_inventory/view_medicine.html', {
-        'medicine': filtered,
+        'medicine': page_obj.object_list,
+        'page_obj': page_obj,
+        'querystring': _querystring_without_cursor(request),
         'categories': categories,
         'recent_actions' : recent_actions,
     })
 
 @pharmacist_required
 def view_medicine_table(request):
-    medicines = Medicine.objects.all()
     categories = [c[0] for c in Medicine.CATEGORY_CHOICES]
+    sort_by, direction = _sort_params(request)
 
-    # Sorting
-    sort_by = request.GET.get('sort', 'name') # Default sort by name
-    direction = request.GET.get('dir', 'asc') # Default direction ascending
-
-    if sort_by not in ['name', 'quantity_in_stock']: # Whitelist sortable fields
-        sort_by = 'name'
-
-    order = sort_by if direction == 'asc' else f'-{sort_by}'
-    medicines = medicines.order_by(order)
-
-    # Filtering (applied after sorting)
-    search_query = request.GET.get('search')
-    category = request.GET.get('category')
-    expiry = request.GET.get('expiry')
-    low_stock = request.GET.get('low_stock')
-
-    if search_query:
-        medicines = medicines.filter(name__icontains=search_query)
+    # Filtering and sorting are evaluated by the database, one keyset page at a time
+    page_obj = _medicine_page(request, _searched_medicines(request), sort_by, direction)
 
-    if category:
-        medicines = medicines.filter(category=category)
-
-    filtered = []
-    for med in medicines:
-        med.low_stock = med.quantity_in_stock < med.reorder_level
-        med.near_expiry = med.is_near_expiry()
-        med.is_expired = med.is_expired()
-        
-        # Expiry filter
-        if expiry == 'near' and not med.near_expiry:
-            continue
-        if expiry == 'expired' and not med.is_expired:
-            continue
-        
-        # Low stock filter
-        if low_stock == 'low' and not med.low_stock:
-            continue
-        filtered.append(med)
-
-    recent_actions = MedicineAction.objects.select_related('medicine').order_by('-timestamp')[:5]
+    recent_actions = _action_page(page_size=RECENT_ACTIONS)
     
     # Pass sorting info to the template
     context = {
-        'medicine': filtered,
+        'medicine': page_obj.object_list,
+        'page_obj': page_obj,
+        'querystring': _querystring_without_cursor(request),
         'categories': categories,
         'recent_actions': recent_actions,
         'current_sort': sort_by,
@@ -150,6 +177,44 @@ def view_medicine_table(request):
     }
     return render(request, 'Medicine_inventory/medicine_table.html', context)
 
+@pharmacist_required
+def medicine_table_json(request):
+    """JSON variant of the medicine table for infinite scroll; pass next_cursor back as ?after=."""
+    sort_by, direction = _sort_params(request)
+    page_obj = _medicine_page(
+        request, _searched_medicines(request), sort_by, direction, fields=MEDICINE_JSON_FIELDS
+    )
+    storage = Medicine._meta.get_field('image').storage
+    results = []
+    for row in page_obj:
+        row['image'] = storage.url(row['image']) if row['image'] else None
+        results.append(row)
+    return JsonResponse({
+        'results': results,
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    })
+
+@pharmacist_required
+def medicine_actions_json(request):
+    """
+    JSON page of the action log, newest first. With ?since=<id>, only the actions
+    written after that one, oldest first, for the dashboard's live refresh.
+    """
+    since = request.GET.get('since')
+    if since is not None and since.isdigit():
+        actions = _actions_since(int(since))
+        return JsonResponse({
+            'results': [_action_json(action) for action in actions],
+            'last_id': actions[-1].pk if actions else int(since),
+        })
+    page_obj = _action_page(request.GET.get('after'), request.GET.get('before'))
+    return JsonResponse({
+        'results': [_action_json(action) for action in page_obj],
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    })
+
 # Create a new medicine entry
 @pharmacist_required
 def create_medicine(request):
@@ -158,11 +223,11 @@ def create_medicine(request):
         if form.is_valid():
             medicine = form.save()
             # Add the user to the action record
-            MedicineAction.objects.create(
+            record_action(MedicineAction(
                 medicine=medicine,
                 action='add',
                 user=request.user  # Add this line
-            )
+            ))
             messages.success(request, f"Successfully registered new medication: '{medicine.name}'.")
             return redirect('medicine_table')
         else:
@@ -177,12 +242,12 @@ def delete_medicine(request, id):
     medicine = get_object_or_404(Medicine, pk=id)
     medicine_name = medicine.name
     
-    MedicineAction.objects.create(
+    record_action(MedicineAction(
         medicine_name=medicine.name,
         batch_number=medicine.batch_number,
         action='delete',
         user=request.user  # Add this line
-    )
+    ))
     medicine.delete()
     
     messages.success(request, f"The record for '{medicine_name}' has been deleted successfully.")
@@ -207,11 +272,11 @@ def update_medicine(request, id):
         form = MedicineForm(request.POST, request.FILES, instance=medicine)  # Include request.FILES
         if form.is_valid():
             medicine = form.save()
-            MedicineAction.objects.create(
+            record_action(MedicineAction(
                 medicine=medicine,
                 action='update',
                 user=request.user  # Add this line
-            )
+            ))
             
             messages.success(request, f"The record for '{medicine.name}' has been updated successfully.")
             
@@ -224,122 +289,70 @@ def update_medicine(request, id):
 def home(request):
     return render(request, 'crudApp/home.html')
 
+MEDICINE_CSV_HEADER = [
+    'Name', 'Brand', 'Category', 'Description', 'Dosage', 'Selling Price', 'Cost Price',
+    'Quantity In Stock', 'Reorder Level', 'Manufacture Date', 'Expiry Date',
+    'Batch Number', 'Supplier'
+]
+MEDICINE_CSV_FIELDS = [
+    'name', 'brand', 'category', 'description', 'dosage', 'selling_price', 'cost_price',
+    'quantity_in_stock', 'reorder_level', 'manufacture_date', 'expiry_date',
+    'batch_number', 'supplier'
+]
+
 @pharmacist_required
 def export_medicine_csv(request):
-    medicines = Medicine.objects.all()
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="medicine_inventory.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow([
-        'Name', 'Brand', 'Category', 'Description', 'Dosage', 'Price',
-        'Quantity In Stock', 'Reorder Level', 'Manufacture Date', 'Expiry Date',
-        'Batch Number', 'Supplier'
-    ])
-    for med in medicines:
-        writer.writerow([
-            med.name, med.brand, med.category, med.description, med.dosage, med.selling_price, med.cost_price,
-            med.quantity_in_stock, med.reorder_level, med.manufacture_date, med.expiry_date,
-            med.batch_number, med.supplier
-        ])
-    return response
+    rows = Medicine.objects.order_by('pk').values_list(*MEDICINE_CSV_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return streaming_csv_response('medicine_inventory.csv', MEDICINE_CSV_HEADER, rows)
 
 @pharmacist_required
 def export_medicine_pdf(request):
-    medicines = Medicine.objects.all()
-    total_medicines = medicines.count()
-    low_stock_count = Medicine.objects.filter(quantity_in_stock__lt=F('reorder_level')).count()
-    expired = medicines.filter(expiry_date__lt=timezone.now().date()).count()
-
-    logo_file = os.path.join(settings.BASE_DIR, 'static/MediSyn_Logo/1.png')
-    with open(logo_file, 'rb') as f:
-        logo_data = base64.b64encode(f.read()).decode('utf-8')
-
-    context = {
-        'medicines': medicines,
-        'now': timezone.now(),
-        'logo_data': logo_data,
-        'total_medicines': total_medicines,
-        'low_stock_count': low_stock_count,
-        'expired': expired,
-    }
-    
-    html_string = render_to_string('Medicine_inventory/medicine_pdf.html', context)
-    pdf_file = HTML(string=html_string).write_pdf()
-    response = HttpResponse(pdf_file, content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="medicine_inventory.pdf"'
-    return response
-
-
+    # Rendering is done by the process_report_jobs worker; the request only queues the job.
+    job = enqueue_report('medicine', user=request.user)
+    return redirect('report_status', pk=job.pk)
 
+@pharmacist_required
+def report_status(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'id': job.pk,
+            'report_type': job.report_type,
+            'status': job.status,
+            'error': job.error,
+            'download_url': reverse('report_download', args=[job.pk]) if job.status == 'done' else None,
+        })
+    return render(request, 'Medicine_inventory/report_status.html', {'job': job})
 
+@pharmacist_required
+def report_download(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk, status='done')
+    return FileResponse(
+        job.file.open('rb'),
+        as_attachment=True,
+        filename=REPORT_FILENAMES[job.report_type],
+        content_type='application/pdf',
+    )
 
 
 @pharmacist_required
 def med_inventory_dash(request):
-    # Get medicine statistics
-    total_medicines = Medicine.objects.count()
-    
-    # Use quantity_in_stock and reorder_level instead of low_stock
-    low_stock_count = Medicine.objects.filter(quantity_in_stock__lt=F('reorder_level')).count()
-    
-    # Calculate near_expiry based on expiry_date
-    today = timezone.now().date()
-    expiry_threshold = today + timezone.timedelta(days=30)  # 30 days until expiry
-    near_expiry_count = Medicine.objects.filter(
-        expiry_date__gt=today,
-        expiry_date__lte=expiry_threshold
-    ).count()
-    
-    # Calculate expired based on expiry_date
-    expired_count = Medicine.objects.filter(expiry_date__lt=today).count()
-    
-    # Get non-medical statistics
-    total_nonmedical = NonMedicalProduct.objects.count()
-    nonmedical_low_stock_count = NonMedicalProduct.objects.filter(stock__lt=F('reorder_level')).count()
-    nonmedical_active_count = NonMedicalProduct.objects.filter(is_active=True).count()
-    nonmedical_categories_count = NonMedicalProduct.objects.values('category').distinct().count()
-    
-    # Get chart data
-    category_data = Medicine.objects.values('category').annotate(count=Count('id')).order_by('-count')
-    category_labels = [item['category'] for item in category_data]
-    category_counts = [item['count'] for item in category_data]
-    
-    # Get non-medical product category data
-    nonmed_category_data = NonMedicalProduct.objects.values('category').annotate(count=Count('id')).order_by('-count')
-    nonmed_category_labels = [item['category'] for item in nonmed_category_data]
-    nonmed_category_counts = [item['count'] for item in nonmed_category_data]
+    # Medicine / non-medical counts and chart data come from the signal-invalidated stats cache
+    stats = get_inventory_stats()
     
     # Get recent medicines
     recent_medicines = Medicine.objects.all().order_by('-manufacture_date')[:5]
     
-    # Get recent actions
-    all_actions = MedicineAction.objects.all().order_by('-timestamp')
-    paginator = Paginator(all_actions, 10)
-    page = request.GET.get('page', 1)
-    
-    try:
-        recent_actions = paginator.page(page)
-    except PageNotAnInteger:
-        recent_actions = paginator.page(1)
-    except EmptyPage:
-        recent_actions = paginator.page(paginator.num_pages)
+    # Get recent actions, one keyset page at a time (no COUNT over the whole log)
+    recent_actions = _action_page(request.GET.get('after'), request.GET.get('before'))
     
     context = {
-        'total_medicines': total_medicines,
-        'low_stock_count': low_stock_count,
-        'near_expiry_count': near_expiry_count,
-        'expired_count': expired_count,
-        'total_nonmedical': total_nonmedical,
-        'nonmedical_low_stock_count': nonmedical_low_stock_count,
-        'nonmedical_active_count': nonmedical_active_count,
-        'nonmedical_categories_count': nonmedical_categories_count,
-        'category_labels': category_labels,
-        'category_counts': category_counts,
-        'nonmed_category_labels': nonmed_category_labels,
-        'nonmed_category_counts': nonmed_category_counts,
+        **stats,
         'recent_medicines': recent_medicines,
         'recent_actions': recent_actions,
+        # Only the first page follows new actions as they are recorded
+        'last_action_id': None if recent_actions.has_previous else _last_action_id(),
+        'action_feed_refresh_ms': ACTION_FEED_REFRESH_MS,
     }
     return render(request, 'Medicine_inventory/med_inventory_dash.html', context)
 
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Non_Medicine_inventory', '0004_alter_nonmedicalproduct_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nonmedicalproduct',
+            name='is_low_stock',
+            field=models.GeneratedField(db_persist=True, expression=models.ExpressionWrapper(models.Q(('stock__lt', models.F('reorder_level'))), output_field=models.BooleanField()), output_field=models.BooleanField()),
+        ),
+        migrations.AddIndex(
+            model_name='nonmedicalproduct',
+            index=models.Index(condition=models.Q(('is_low_stock', True)), fields=['name'], name='nonmedical_low_stock_idx'),
+        ),
+    ]
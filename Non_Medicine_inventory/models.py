@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
-from django.db.models import F
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
 
 class NonMedicalProduct(models.Model):
     CATEGORY_CHOICES = [
@@ -25,6 +27,12 @@ class NonMedicalProduct(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     reorder_level = models.PositiveIntegerField(default=5)
+    # Kept by the database, so low-stock filters and counts can use an index
+    is_low_stock = models.GeneratedField(
+        expression=ExpressionWrapper(Q(stock__lt=F('reorder_level')), output_field=BooleanField()),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -37,4 +45,25 @@ class NonMedicalProduct(models.Model):
     class Meta:
         ordering = ['name']
         verbose_name = 'Non-Medical Product'
-        verbose_name_plural = 'Non-Medical Products'
\ No newline at end of file
+        verbose_name_plural = 'Non-Medical Products'
+        indexes = [
+            # Only the low-stock rows, by name (partial index, as on Medicine)
+            models.Index(fields=['name'], name='nonmedical_low_stock_idx', condition=Q(is_low_stock=True)),
+        ]
+
+class NonMedicalProductAction(models.Model):
+    """Audit row for a product created / updated / deleted; written through Medicine_inventory.audit."""
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+    ]
+    product = models.ForeignKey(NonMedicalProduct, on_delete=models.SET_NULL, null=True, blank=True)
+    product_name = models.CharField(max_length=255)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # Set when the action is recorded, not when the buffered row is written
+    timestamp = models.DateTimeField(default=timezone.now)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+
+    def __str__(self):
+        return f"{self.product_name} {self.get_action_display()} at {self.timestamp}"
\ No newline at end of file
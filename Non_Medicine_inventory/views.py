@@ -1,18 +1,10 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from django.db.models import F
-from .models import NonMedicalProduct
+from .models import NonMedicalProduct, NonMedicalProductAction
 from .forms import NonMedicalProductForm
-import csv
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from weasyprint import HTML
-from django.conf import settings
-import tempfile
-import os
-from django.utils import timezone
-import base64
-from django.contrib.auth.decorators import login_required
+from Medicine_inventory.audit import record_action
+from Medicine_inventory.exports import EXPORT_CHUNK_SIZE, streaming_csv_response
+from Medicine_inventory.reports import enqueue_report
 
 
 from django.shortcuts import render, redirect, get_object_or_404
@@ -67,6 +59,9 @@ def product_create(request):
         form = NonMedicalProductForm(request.POST, request.FILES)
         if form.is_valid():
             product = form.save()
+            record_action(NonMedicalProductAction(
+                product=product, product_name=product.name, action='created', user=request.user
+            ))
             messages.success(request, f'Product "{product.name}" has been created successfully.')
             return redirect('non_medicine:product_list')
     else:
@@ -84,6 +79,9 @@ def product_update(request, slug):
         form = NonMedicalProductForm(request.POST, request.FILES, instance=product)
         if form.is_valid():
             form.save()
+            record_action(NonMedicalProductAction(
+                product=product, product_name=product.name, action='updated', user=request.user
+            ))
             messages.success(request, f'Product "{product.name}" has been updated successfully.')
             return redirect('non_medicine:product_detail', slug=product.slug)
     else:
@@ -99,6 +97,7 @@ def product_delete(request, slug):
     product_name = product.name
     
     if request.method == 'POST':
+        record_action(NonMedicalProductAction(product_name=product_name, action='deleted', user=request.user))
         product.delete()
         messages.success(request, f'Product "{product_name}" has been deleted successfully.')
         return redirect('non_medicine:product_list')
@@ -134,40 +133,13 @@ def product_table(request):
 
 @pharmacist_required
 def export_pdf(request):
-    # Get filtered products (same logic as in product_list view)
-    products = NonMedicalProduct.objects.all()
-    category = request.GET.get('category')
-    search_query = request.GET.get('search')
-
-    logo_file = os.path.join(settings.BASE_DIR, 'static/MediSyn_Logo/1.png')
-    with open(logo_file, 'rb') as f:
-        logo_data = base64.b64encode(f.read()).decode('utf-8')
-    
-    if category:
-        products = products.filter(category=category)
-    if search_query:
-        products = products.filter(name__icontains=search_query)
-    
-    # Prepare context for the template
-    context = {
-        'products': products,
-        'title': 'Non-Medical Products Report',
-        'now': timezone.now(),
-        'logo_data': logo_data,
-        'request': request,
+    # Queue the report with the same filters as product_list; the worker renders it
+    params = {
+        'category': request.GET.get('category') or '',
+        'search': request.GET.get('search') or '',
     }
-    
-    # Render HTML content
-    html_string = render_to_string('Non_Medicine_inventory/pdf_template.html', context)
-    
-    # Create HTTP response with PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="non_medical_products.pdf"'
-    
-    # Generate PDF from HTML
-    HTML(string=html_string).write_pdf(response)
-    
-    return response
+    job = enqueue_report('non_medical', params, user=request.user)
+    return redirect('report_status', pk=job.pk)
 
 @pharmacist_required
 def export_csv(request):
@@ -181,24 +153,19 @@ def export_csv(request):
     if search_query:
         products = products.filter(name__icontains=search_query)
     
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="non_medical_products.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Name', 'Brand', 'Category', 'Description', 'Cost Price', 'Selling Price', 'Stock', 'Reorder Level', 'Status'])
-    
-    for product in products:
-        writer.writerow([
-            product.name,
-            product.brand,
-            product.get_category_display(),
-            product.description,
-            product.cost_price,
-            product.selling_price,
-            product.stock,
-            product.reorder_level,
-            'Active' if product.is_active else 'Inactive'
-        ])
-    
-    return response
\ No newline at end of file
+    # Stream the rows straight from the database cursor
+    category_labels = dict(NonMedicalProduct.CATEGORY_CHOICES)
+    rows = (
+        [name, brand, category_labels.get(category, category), description,
+         cost_price, selling_price, stock, reorder_level, 'Active' if is_active else 'Inactive']
+        for name, brand, category, description, cost_price, selling_price, stock, reorder_level, is_active
+        in products.values_list(
+            'name', 'brand', 'category', 'description', 'cost_price', 'selling_price',
+            'stock', 'reorder_level', 'is_active',
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return streaming_csv_response(
+        'non_medical_products.csv',
+        ['Name', 'Brand', 'Category', 'Description', 'Cost Price', 'Selling Price', 'Stock', 'Reorder Level', 'Status'],
+        rows,
+    )
@@ -157,6 +157,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Rendered prescription and invoice PDFs, named by a hash of their content
+PDF_CACHE_ROOT = BASE_DIR / 'pdf_cache'
+
+# Use the SQLite FTS5 index for patient search (falls back to the indexed columns when absent)
+PATIENT_SEARCH_FTS = True
+DOCTOR_SEARCH_FTS = True
+
 STRIPE_PUBLISHABLE_KEY = 'pk_test_51RuS6kLxYGksYlO5cOHxyasQv42vYzERNmGu7gGnrd4T5uhHNtYZxDiLQIqYRAen1aMX0mp34VzuAmFPzv5mYgmq00kovaF8kT'
 STRIPE_SECRET_KEY = 'sk_test_51RuS6kLxYGksYlO5mMYeMxHMNY1d0C9gwaxTURULb7K6xtfYe49N1fakp7h2gQLOMMyUxkKytEzOGCfUKAQ2d9mY003oUw3FVb'
 
@@ -0,0 +1,40 @@
+from django.template.loader import render_to_string
+from weasyprint import HTML
+
+from Medicine_inventory.pdf_assets import asset_url_fetcher, stylesheet
+from prescriptions.pdf import item_rows
+from prescriptions.pdf_cache import content_hash, template_version
+
+INVOICE_TEMPLATE = 'payments/invoice_pdf.html'
+INVOICE_STYLESHEET = 'pdf/invoice.css'
+# Placeholder kept from the original invoice until Payment.status is wired in
+INVOICE_STATUS = 'Paid'
+
+
+def invoice_fingerprint(payment, prescription):
+    """Hash of everything the invoice PDF shows; used as its cache key and ETag."""
+    patient = prescription.patient
+    return content_hash({
+        'version': template_version(INVOICE_TEMPLATE, INVOICE_STYLESHEET),
+        'payment': [payment.pk, INVOICE_STATUS],
+        'patient': [patient.first_name, patient.last_name, patient.date_of_birth],
+        'items': item_rows(prescription),
+    })
+
+
+def render_invoice_pdf(payment, prescription):
+    """
+    Render the invoice for `payment` to PDF bytes. Expects `prescription` to come
+    with items__medicine prefetched and with_total_cost() applied, otherwise the
+    rows and the total each cost extra queries.
+    """
+    html = render_to_string(INVOICE_TEMPLATE, {
+        'payment': payment,
+        'prescription': prescription,
+        'items': prescription.items.all(),
+        'total_cost': prescription.total_cost,
+        'payment_status': INVOICE_STATUS,
+    })
+    return HTML(string=html, url_fetcher=asset_url_fetcher()).write_pdf(
+        stylesheets=[stylesheet(INVOICE_STYLESHEET)],
+    )
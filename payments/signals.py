@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from prescriptions.models import PrescriptionItem
+from prescriptions.pdf_cache import invalidate_pdf
+from prescriptions.signals import prescription_items_changed
+from .models import Payment
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def invalidate_invoice_pdf(sender, instance, **kwargs):
+    invalidate_pdf('invoice', instance.pk)
+
+
+@receiver(post_save, sender=PrescriptionItem)
+@receiver(post_delete, sender=PrescriptionItem)
+def invalidate_invoice_pdfs_for_item(sender, instance, **kwargs):
+    """Invoices print the prescription's items, so every payment against it is stale."""
+    invalidate_invoice_pdfs_for_items(sender, instance.prescription_id)
+
+
+@receiver(prescription_items_changed)
+def invalidate_invoice_pdfs_for_items(sender, prescription_id, **kwargs):
+    for payment_pk in Payment.objects.filter(prescription_id=prescription_id).values_list('pk', flat=True):
+        invalidate_pdf('invoice', payment_pk)
@@ -4,12 +4,12 @@ from django.http import FileResponse, HttpResponse
 from django.shortcuts import redirect, get_object_or_404, render
 from django.conf import settings
 from django.contrib import messages
-from prompt_toolkit import HTML
 import stripe
 from prescriptions.models import Prescription, PrescriptionItem
 from .models import *
 from django.core.paginator import Paginator
-from weasyprint import HTML
+from .pdf import invoice_fingerprint, render_invoice_pdf
+from prescriptions.pdf_cache import cached_pdf_response
 from django.template.loader import render_to_string
 from django.core.mail import send_mail
 
@@ -131,182 +131,18 @@ def generate_invoice_pdf(request, pk):
     
     payment = get_object_or_404(Payment, pk=pk)
     
-    prescription = get_object_or_404(Prescription.objects.prefetch_related('items__medicine'), pk=payment.prescription.pk)
-
-    # Create a file-like buffer to receive PDF data.
-    buffer = io.BytesIO()
-
-    # Generate table rows for the invoice items
-    table_rows = "".join([
-        f"""
-        <tr>
-            <td>{item.medicine.name} ({item.medicine.batch_number})</td>
-            <td>{item.dispensed_quantity}</td>
-            <td class="price-cell">${item.medicine.selling_price:.2f}</td>
-            <td class="price-cell">${item.total_price:.2f}</td>
-        </tr>
-        """ for item in prescription.items.all()
-    ])
-
-    # Get the payment status (e.g., 'Paid', 'Pending', 'Cancelled')
-    # You'll need to update this part to match your Payment model's field
-    payment_status = "Paid" # Placeholder, replace with your actual field
-
-    # Construct the HTML content for the PDF, with improved styling
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Invoice #{payment.id}</title>
-        <style>
-            @page {{
-                size: a4;
-                margin: 0.75in;
-            }}
-            body {{
-                font-family: 'Helvetica Neue', Helvetica, Arial, sans-serif;
-                margin: 0;
-                padding: 0;
-                font-size: 10pt;
-            }}
-            .container {{
-                width: 100%; /* Use 100% to fill the page, letting @page handle margins */
-                max-width: 7in; /* A safe max-width for A4 */
-                margin-left: auto;
-                margin-right: auto;
-            }}
-            .header {{
-                text-align: center;
-                margin-bottom: 20pt;
-                padding-bottom: 10pt;
-                border-bottom: 2px solid #333;
-            }}
-            .header h1 {{
-                font-size: 24pt;
-                margin: 0;
-                color: #004d40;
-            }}
-            .header p {{
-                font-size: 10pt;
-                margin: 5pt 0 0;
-                color: #555;
-            }}
-            .invoice-info {{
-                display: flex;
-                justify-content: space-between;
-                margin-bottom: 30pt;
-            }}
-            .invoice-info div {{
-                width: 48%;
-            }}
-            .invoice-info h2 {{
-                font-size: 14pt;
-                margin: 0 0 10pt;
-                color: #004d40;
-            }}
-            .info-block p {{
-                margin: 2pt 0;
-                font-size: 10pt;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-bottom: 20pt;
-            }}
-            th, td {{
-                border: 1px solid #ddd;
-                padding: 10pt;
-                text-align: left;
-            }}
-            th {{
-                background-color: #f2f2f2;
-                color: #333;
-                text-transform: uppercase;
-            }}
-            .price-cell {{
-                text-align: right;
-                font-weight: bold;
-            }}
-            .total-section {{
-                text-align: right;
-                font-size: 12pt;
-                margin-top: 20pt;
-            }}
-            .total-section p {{
-                font-size: 14pt;
-                font-weight: bold;
-                margin: 5pt 0;
-            }}
-            .total-section .label {{
-                color: #555;
-                font-weight: normal;
-            }}
-            .footer {{
-                text-align: center;
-                margin-top: 40pt;
-                padding-top: 10pt;
-                border-top: 1px solid #ddd;
-                font-size: 9pt;
-                color: #777;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>Pharmacy Rix</h1>
-                <p>123 Medical Drive, Healthville, USA</p>
-            </div>
-
-            <div class="invoice-info">
-                <div class="info-block">
-                    <h2>Invoice To:</h2>
-                    <p><strong>{prescription.patient.first_name} {prescription.patient.last_name}</strong></p>
-                    <p>DOB: {prescription.patient.date_of_birth.strftime('%Y-%m-%d')}</p>
-                </div>
-                <div class="info-block" style="text-align: right;">
-                    <h2>Invoice Details:</h2>
-                    <p><strong>Invoice ID:</strong> INV-{payment.id}</p>
-                    <p><strong>Status:</strong> {payment_status}</p>
-                </div>
-            </div>
-
-            <table>
-                <thead>
-                    <tr>
-                        <th>Item</th>
-                        <th>Qty</th>
-                        <th>Unit Price</th>
-                        <th>Total</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {table_rows}
-                </tbody>
-            </table>
-            
-            <div class="total-section">
-                <p><span class="label">Total Amount:</span> ${prescription.total_cost:.2f}</p>
-            </div>
-            
-            <div class="footer">
-                <p>Thank you for your business. All payments are due upon receipt.</p>
-                <p>For questions regarding this invoice, please contact us at support@pharmacyrix.com.</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-
-    
-    # Generate the PDF into an in-memory buffer
-    HTML(string=html_content).write_pdf(buffer)
+    prescription = get_object_or_404(
+        Prescription.objects.select_related('patient').prefetch_related('items__medicine').with_total_cost(),
+        pk=payment.prescription_id,
+    )
 
-    # Get the value of the BytesIO buffer and set up the HTTP response.
-    buffer.seek(0)
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="prescription_{prescription.id}.pdf"'
-    return response
+    # Serve the cached copy when nothing the invoice shows has changed
+    return cached_pdf_response(
+        request, 'invoice', payment.pk,
+        invoice_fingerprint(payment, prescription),
+        lambda: render_invoice_pdf(payment, prescription),
+        f'prescription_{prescription.id}.pdf',
+    )
 
 
 
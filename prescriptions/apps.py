@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PrescriptionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "prescriptions"
+
+    def ready(self):
+        # Connect the receivers that drop cached PDFs when their rows change.
+        import prescriptions.signals
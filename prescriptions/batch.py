@@ -0,0 +1,94 @@
+"""
+Bulk printing of prescription PDFs.
+
+All prescriptions are loaded up front in a fixed number of queries. The parent
+process fills in the templates, which is cheap. The print_prescriptions
+command hands only the HTML to worker processes for the expensive WeasyPrint
+layout; the web endpoint renders in the request, since starting a pool (each
+process running django.setup()) per request costs more than it saves. PDFs
+already in the on-disk cache are reused instead of rendered again.
+"""
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from Medicine_inventory.report_worker import init_worker
+from .models import Prescription
+from .pdf import html_to_prescription_pdf, prescription_document, prescription_fingerprint, prescription_html
+from .pdf_cache import cached_pdf_path, store_pdf
+
+BATCH_FORMATS = ('zip', 'pdf')
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+# The endpoint renders serially in the request, so keep a single request bounded
+MAX_BATCH_SIZE = 50
+
+
+def batch_prescriptions(ids=None, date_from=None, date_to=None):
+    """
+    Prescriptions selected by id and/or prescription date, oldest first, with
+    patient, doctor, items__medicine and the total cost loaded in three queries.
+    """
+    prescriptions = (
+        Prescription.objects.select_related('patient', 'doctor')
+        .prefetch_related('items__medicine')
+        .with_total_cost()
+    )
+    if ids:
+        prescriptions = prescriptions.filter(pk__in=ids)
+    if date_from:
+        prescriptions = prescriptions.filter(prescription_date__gte=date_from)
+    if date_to:
+        prescriptions = prescriptions.filter(prescription_date__lte=date_to)
+    return prescriptions.order_by('prescription_date', 'pk')
+
+
+def _render_pdfs(htmls, workers):
+    if workers <= 1 or len(htmls) <= 1:
+        return [html_to_prescription_pdf(html) for html in htmls]
+    # Spawned (not forked) processes so no database connection is shared with the parent.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(htmls)), mp_context=context,
+                             initializer=init_worker) as pool:
+        return list(pool.map(html_to_prescription_pdf, htmls))
+
+
+def render_prescription_zip(prescriptions, workers=1):
+    """
+    Zip of one PDF per prescription. Cache misses are rendered in `workers`
+    processes, or in this one when `workers` is 1.
+    """
+    prescriptions = list(prescriptions)
+    pdfs, missing = {}, []
+    for prescription in prescriptions:
+        path = cached_pdf_path('prescription', prescription.pk, prescription_fingerprint(prescription))
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                pdfs[prescription.pk] = f.read()
+        else:
+            missing.append((prescription, path))
+
+    rendered = _render_pdfs([prescription_html(prescription) for prescription, _ in missing], workers)
+    for (prescription, path), pdf in zip(missing, rendered):
+        store_pdf(path, pdf)
+        pdfs[prescription.pk] = pdf
+
+    buffer = io.BytesIO()
+    # PDFs are already compressed; deflating them again only costs time
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for prescription in prescriptions:
+            archive.writestr(f'prescription_{prescription.pk}.pdf', pdfs[prescription.pk])
+    return buffer.getvalue()
+
+
+def render_prescription_merged_pdf(prescriptions):
+    """
+    One PDF with every prescription in order. WeasyPrint documents cannot cross
+    process boundaries, so the layout runs here; use the zip for parallel rendering.
+    """
+    documents = [prescription_document(prescription_html(prescription)) for prescription in prescriptions]
+    if not documents:
+        return None
+    pages = [page for document in documents for page in document.pages]
+    return documents[0].copy(pages).write_pdf()
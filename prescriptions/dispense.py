@@ -0,0 +1,135 @@
+"""
+Dispensing all items of a prescription in one request.
+
+Stock for every line is allocated first expiry first out by
+Medicine_inventory.stock.allocate_fefo_many (one locking read, one UPDATE),
+then the items are written with one bulk_create and one bulk_update and the
+interactions are checked once, all in a single transaction.
+"""
+from collections import OrderedDict
+
+from django.db import transaction
+
+from Medicine_inventory.models import Medicine
+from Medicine_inventory.stock import allocate_fefo_many
+from .interactions import check_prescription
+from .models import PrescriptionItem
+from .signals import prescription_items_changed
+
+MAX_DISPENSE_ITEMS = 50
+
+
+class DispenseError(ValueError):
+    """The request body is invalid; `errors` maps an item index (or '__all__') to a message."""
+
+    def __init__(self, errors):
+        super().__init__('Invalid dispense request.')
+        self.errors = errors
+
+
+def _text(value, field):
+    max_length = PrescriptionItem._meta.get_field(field).max_length
+    value = value.strip() if isinstance(value, str) else ''
+    if not value:
+        return None, 'is required'
+    if len(value) > max_length:
+        return None, f'must be at most {max_length} characters'
+    return value, None
+
+
+def parse_dispense_lines(payload):
+    """
+    Validate {"items": [{"medicine", "requested_quantity", "dosage", "duration"}, ...]}
+    and return [(medicine, quantity, dosage, duration)], loading all medicines in one query.
+    """
+    items = payload.get('items') if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise DispenseError({'__all__': 'Send a non-empty "items" list.'})
+    if len(items) > MAX_DISPENSE_ITEMS:
+        raise DispenseError({'__all__': f'At most {MAX_DISPENSE_ITEMS} items per request.'})
+
+    errors, parsed = {}, []
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        problems = []
+        medicine_id, quantity = item.get('medicine'), item.get('requested_quantity')
+        if not isinstance(medicine_id, int) or isinstance(medicine_id, bool):
+            problems.append('medicine must be a medicine id')
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            problems.append('requested_quantity must be at least 1')
+        dosage, dosage_error = _text(item.get('dosage'), 'dosage')
+        duration, duration_error = _text(item.get('duration'), 'duration')
+        problems += [f'{field} {error}' for field, error in (('dosage', dosage_error), ('duration', duration_error)) if error]
+        if problems:
+            errors[index] = '; '.join(problems)
+        parsed.append((medicine_id, quantity, dosage, duration))
+
+    medicines = Medicine.objects.only('name', 'dosage').in_bulk(
+        {medicine_id for medicine_id, _, _, _ in parsed if isinstance(medicine_id, int)}
+    )
+    for index, (medicine_id, _, _, _) in enumerate(parsed):
+        if index not in errors and medicine_id not in medicines:
+            errors[index] = f'medicine {medicine_id} does not exist'
+    if errors:
+        raise DispenseError(errors)
+    return [(medicines[medicine_id], quantity, dosage, duration) for medicine_id, quantity, dosage, duration in parsed]
+
+
+def dispense_items(prescription, lines, partial=False):
+    """
+    Dispense `lines` (from parse_dispense_lines) onto `prescription`. Raises
+    StockShortage, changing nothing, if any line is short and `partial` is false.
+    Returns one {"medicine", "requested", "dispensed", "batches"} dict per line.
+    """
+    with transaction.atomic():
+        allocations = allocate_fefo_many(
+            [(medicine.name, medicine.dosage, quantity) for medicine, quantity, _, _ in lines], partial=partial,
+            reference=f'prescription:{prescription.pk}',
+        )
+
+        # Merge lines that landed on the same batch; one item per batch, as add_prescription_item does
+        rows = OrderedDict()
+        for (medicine, quantity, dosage, duration), allocation in zip(lines, allocations):
+            shortfall = quantity - sum(taken for _, taken in allocation)
+            # A line with nothing left to dispense (partial only) is still
+            # prescribed: it goes on the selected batch with nothing dispensed
+            for position, (batch, taken) in enumerate(allocation or [(medicine, 0)]):
+                row = rows.setdefault(batch.pk, {'requested': 0, 'dispensed': 0})
+                row['requested'] += taken + (shortfall if position == 0 else 0)
+                row['dispensed'] += taken
+                row['dosage'], row['duration'] = dosage, duration
+
+        existing = {item.medicine_id: item for item in prescription.items.filter(medicine_id__in=list(rows))}
+        created, updated = [], []
+        for medicine_id, row in rows.items():
+            item = existing.get(medicine_id)
+            if item is None:
+                created.append(PrescriptionItem(
+                    prescription=prescription, medicine_id=medicine_id, dosage=row['dosage'],
+                    duration=row['duration'], requested_quantity=row['requested'], dispensed_quantity=row['dispensed'],
+                ))
+            else:
+                item.requested_quantity += row['requested']
+                item.dispensed_quantity += row['dispensed']
+                item.dosage, item.duration = row['dosage'], row['duration']
+                updated.append(item)
+        PrescriptionItem.objects.bulk_create(created)
+        PrescriptionItem.objects.bulk_update(
+            updated, ['requested_quantity', 'dispensed_quantity', 'dosage', 'duration'],
+        )
+        # bulk writes send no post_save; this keeps the PDF caches in step
+        prescription_items_changed.send(sender=PrescriptionItem, prescription_id=prescription.pk)
+        check_prescription(prescription)
+
+    return [
+        {
+            'medicine': medicine.pk,
+            'requested': quantity,
+            'dispensed': sum(taken for _, taken in allocation),
+            'batches': [
+                {'medicine': batch.pk, 'batch_number': batch.batch_number, 'quantity': taken}
+                for batch, taken in allocation
+            ],
+        }
+        for (medicine, quantity, _, _), allocation in zip(lines, allocations)
+    ]
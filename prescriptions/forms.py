@@ -5,6 +5,8 @@ from .models import Patient, Doctor, Prescription, PrescriptionItem, DrugInterac
 # Import the Medicine model from the Medicine_Inventory app
 from Medicine_inventory.models import Medicine
 from django.core.exceptions import ValidationError # Import ValidationError for custom validation
+from django.urls import reverse_lazy
+from .search import find_doctor_by_code, search_medicines
 
 # Form for creating and updating Patient instances.
 class PatientForm(forms.ModelForm):
@@ -63,7 +65,12 @@ class PrescriptionForm(forms.ModelForm):
         max_length=50,
         label="Doctor's Medical Code",
         help_text="Enter the unique medical code of the prescribing doctor.",
-        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g., MD12345'})
+        # Typeahead: suggestions come from the doctor_autocomplete JSON endpoint
+        widget=forms.TextInput(attrs={
+            'class': 'form-control', 'placeholder': 'e.g., MD12345 or a doctor name',
+            'list': 'doctor_options', 'autocomplete': 'off',
+            'data-autocomplete-url': reverse_lazy('doctor_autocomplete'),
+        })
     )
     doctor_last_name = forms.CharField(
         max_length=100,
@@ -94,18 +101,14 @@ class PrescriptionForm(forms.ModelForm):
         last_name = cleaned_data.get('doctor_last_name')
 
         if medical_code and last_name:
-            try:
-                # Attempt to find a doctor matching both the medical code and last name.
-                # Using __iexact for case-insensitive exact match for medical code.
-                # Using __iexact for case-insensitive exact match for last name.
-                doctor = Doctor.objects.get(
-                    medical_code__iexact=medical_code,
-                    last_name__iexact=last_name
-                )
+            # Look the doctor up by medical code (unique index first, then case-insensitive),
+            # then verify the last name case-insensitively.
+            doctor = find_doctor_by_code(medical_code)
+            if doctor is not None and doctor.last_name.casefold() == last_name.strip().casefold():
                 # If a doctor is found, store the Doctor object in cleaned_data
                 # so it can be accessed in the view (form_valid method).
                 cleaned_data['doctor'] = doctor
-            except Doctor.DoesNotExist:
+            else:
                 # If no matching doctor is found, raise a validation error.
                 raise ValidationError(
                     "Invalid Doctor details. No registered doctor found with the provided Medical Code and Last Name. Please check the details or register the doctor.",
@@ -126,11 +129,14 @@ class PrescriptionForm(forms.ModelForm):
 class PrescriptionItemForm(forms.ModelForm):
     # Override the medicine field to use a ModelChoiceField for better control
     # and to ensure it pulls from the Medicine_Inventory.Medicine model.
-    # The queryset fetches all available medicines (batches) from the inventory.
+    # Only dispensable batches validate (the ones medicine_search offers), but the
+    # <select> only renders the chosen one; the page fills it from the
+    # medicine_search endpoint as the pharmacist types.
     medicine = forms.ModelChoiceField(
-        queryset=Medicine.objects.all().order_by('name', 'batch_number'),
+        queryset=Medicine.objects.all(),
         label="Select Medicine (Batch)",
-        widget=forms.Select(attrs={'class': 'form-control'})
+        error_messages={'invalid_choice': "That batch is out of stock or expired; choose another."},
+        widget=forms.Select(attrs={'class': 'form-control', 'data-search-url': reverse_lazy('medicine_search')})
     )
 
     class Meta:
@@ -152,6 +158,20 @@ class PrescriptionItemForm(forms.ModelForm):
             'requested_quantity': 'Requested Quantity',
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Same filter as the picker; an item being edited keeps its own batch
+        dispensable = search_medicines('')
+        if self.instance.medicine_id:
+            dispensable = dispensable | Medicine.objects.filter(pk=self.instance.medicine_id)
+        self.fields['medicine'].queryset = dispensable
+        # Render only the selected batch instead of iterating the whole catalogue
+        selected = self['medicine'].value()
+        choices = [('', '---------')]
+        if str(selected or '').isdigit():
+            choices += [(medicine.pk, str(medicine)) for medicine in Medicine.objects.filter(pk=selected)]
+        self.fields['medicine'].widget.choices = choices
+
     # Custom validation for requested_quantity (optional, but good for early checks)
     def clean_requested_quantity(self):
         requested_quantity = self.cleaned_data['requested_quantity']
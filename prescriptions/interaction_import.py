@@ -0,0 +1,148 @@
+"""
+Bulk import of DrugInteraction rows from CSV, JSON or JSON Lines files.
+
+Files are read row by row, so memory stays flat however large they are. Each
+pair is put into canonical order (the same order pair_key() uses) and, if it
+already exists under another spelling or order, mapped onto that row, so
+re-importing a dataset updates rows instead of duplicating them. Rows are
+upserted with bulk_create(update_conflicts=True) in chunks, all inside one
+transaction.
+"""
+import csv
+import json
+import os
+
+from django.db import transaction
+
+from .interactions import invalidate_interaction_index, normalize_drug_name, pair_key
+from .models import DrugInteraction
+
+IMPORT_FORMATS = ('csv', 'json', 'jsonl')
+IMPORT_CHUNK_SIZE = 1000
+REQUIRED_FIELDS = ('drug1_name', 'drug2_name', 'interaction_description')
+# How much of a JSON array file is read at a time
+_JSON_READ_SIZE = 64 * 1024
+
+
+class InteractionImportError(ValueError):
+    pass
+
+
+def guess_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return {'ndjson': 'jsonl'}.get(extension, extension)
+
+
+def _iter_json_array(f):
+    """Yield the items of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer, position, started = '', 0, False
+    while True:
+        chunk = f.read(_JSON_READ_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started:
+                if position == len(buffer):
+                    break
+                if buffer[position] != '[':
+                    raise InteractionImportError('A JSON file must contain an array of objects.')
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The item continues in the next chunk
+                if not chunk:
+                    raise InteractionImportError('The JSON array is incomplete or malformed.')
+                break
+            yield item
+        if not chunk:
+            raise InteractionImportError('The JSON array is not closed.')
+
+
+def read_interactions(f, file_format):
+    """Yield one dict per interaction from the open text file `f`."""
+    if file_format == 'csv':
+        yield from csv.DictReader(f)
+    elif file_format == 'jsonl':
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    elif file_format == 'json':
+        yield from _iter_json_array(f)
+    else:
+        raise InteractionImportError(f"Unsupported format '{file_format}'; use one of {', '.join(IMPORT_FORMATS)}.")
+
+
+def _existing_pairs():
+    """pair_key -> (drug1_name, drug2_name) as already stored, oldest row first."""
+    existing = {}
+    rows = DrugInteraction.objects.order_by('-pk').values_list('drug1_name', 'drug2_name')
+    for drug1, drug2 in rows.iterator():
+        existing[pair_key(drug1, drug2)] = (drug1, drug2)
+    return existing
+
+
+def _canonical(row, existing):
+    """An unsaved DrugInteraction for `row`, or None if the row cannot be imported."""
+    if not isinstance(row, dict) or any(not str(row.get(field) or '').strip() for field in REQUIRED_FIELDS):
+        return None
+    drug1, drug2 = str(row['drug1_name']).strip(), str(row['drug2_name']).strip()
+    key = pair_key(drug1, drug2)
+    if key[0] == key[1]:
+        return None
+    if key in existing:
+        drug1, drug2 = existing[key]
+    elif normalize_drug_name(drug1) != key[0]:
+        drug1, drug2 = drug2, drug1
+    existing[key] = (drug1, drug2)
+    return DrugInteraction(
+        drug1_name=drug1,
+        drug2_name=drug2,
+        interaction_description=str(row['interaction_description']).strip(),
+        severity=str(row.get('severity') or '').strip() or None,
+    )
+
+
+def _upsert(chunk):
+    DrugInteraction.objects.bulk_create(
+        chunk.values(),
+        update_conflicts=True,
+        unique_fields=['drug1_name', 'drug2_name'],
+        update_fields=['interaction_description', 'severity'],
+    )
+
+
+def import_interactions(rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Upsert `rows` (dicts with drug1_name, drug2_name, interaction_description and
+    optionally severity). Returns (imported, skipped). Nothing is saved if any
+    chunk fails.
+    """
+    imported = skipped = 0
+    with transaction.atomic():
+        existing = _existing_pairs()
+        # Keyed by pair so a pair repeated within a chunk is sent once, last one wins
+        chunk = {}
+        for row in rows:
+            interaction = _canonical(row, existing)
+            if interaction is None:
+                skipped += 1
+                continue
+            chunk[interaction.drug1_name, interaction.drug2_name] = interaction
+            imported += 1
+            if len(chunk) >= chunk_size:
+                _upsert(chunk)
+                chunk = {}
+        if chunk:
+            _upsert(chunk)
+        # bulk_create sends no signals, so move the index version on explicitly;
+        # running servers reload once this transaction commits
+        invalidate_interaction_index()
+    return imported, skipped
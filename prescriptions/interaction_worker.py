@@ -0,0 +1,26 @@
+"""
+Entry points for interaction re-validation worker processes.
+
+Like Medicine_inventory.report_worker, this module must not import models at
+import time: spawned pool processes unpickle these functions before Django is
+set up.
+"""
+import django
+
+# The parent's interaction index, shipped once to each worker by init_worker
+_index = None
+
+
+def init_worker(index):
+    global _index
+    django.setup()
+    _index = index
+
+
+def check_medicine_names(rows):
+    """[(pk, [medicine names])] -> [(pk, is_validated, interaction_warning)]."""
+    from .interactions import find_interactions, interaction_warning_text
+    return [
+        (pk, bool(names), interaction_warning_text(find_interactions(names, index=_index)))
+        for pk, names in rows
+    ]
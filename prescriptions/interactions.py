@@ -0,0 +1,108 @@
+"""
+Drug interaction checking.
+
+The whole DrugInteraction table is loaded into a dict keyed by the normalised,
+order-independent pair of drug names, once per process. Checking a
+prescription is then one query for its medicine names and a dict lookup for
+each of the k*(k-1)/2 pairs.
+
+Edits to DrugInteraction (see prescriptions.signals) drop the local copy and
+bump the table's version in the database (Medicine_inventory.versions). Every
+check reads that version, one primary-key lookup, so the other web workers
+reload on their next check. Code that writes the table without model signals
+(bulk_create, update) must call invalidate_interaction_index() itself, inside
+its transaction so the new version is committed with the rows.
+"""
+from itertools import combinations
+
+from Medicine_inventory.versions import bump_version, get_version
+from .models import DrugInteraction
+from .normalization import normalize_text
+
+INTERACTION_INDEX_VERSION = 'drug_interactions'
+# Most severe first when listing warnings; unknown severities sort last
+SEVERITY_RANK = {'severe': 0, 'major': 0, 'moderate': 1, 'mild': 2, 'minor': 2}
+
+# (version, index) for this process; None until the first check
+_loaded = None
+
+
+def normalize_drug_name(name):
+    """'  Warfarin  Sodium' -> 'warfarin sodium'."""
+    return ' '.join(normalize_text(name).split())
+
+
+def pair_key(name1, name2):
+    """The same key for (a, b) and (b, a)."""
+    name1, name2 = normalize_drug_name(name1), normalize_drug_name(name2)
+    return (name1, name2) if name1 <= name2 else (name2, name1)
+
+
+def build_interaction_index():
+    """{pair_key: [(severity, description, drug1_name, drug2_name), ...]} for every DrugInteraction."""
+    index = {}
+    rows = DrugInteraction.objects.order_by('pk').values_list(
+        'drug1_name', 'drug2_name', 'severity', 'interaction_description',
+    )
+    for drug1, drug2, severity, description in rows.iterator():
+        key = pair_key(drug1, drug2)
+        if key[0] == key[1]:
+            continue
+        index.setdefault(key, []).append((severity or '', description, drug1, drug2))
+    return index
+
+
+def interaction_index():
+    """This process's interaction index, reloaded when the shared version has moved on."""
+    global _loaded
+    version = get_version(INTERACTION_INDEX_VERSION)
+    if _loaded is None or _loaded[0] != version:
+        _loaded = (version, build_interaction_index())
+    return _loaded[1]
+
+
+def invalidate_interaction_index():
+    global _loaded
+    _loaded = None
+    bump_version(INTERACTION_INDEX_VERSION)
+
+
+def find_interactions(medicine_names, index=None):
+    """
+    Known interactions between any two of `medicine_names`, most severe first.
+    Several batches of the same medicine count as one drug.
+    """
+    index = interaction_index() if index is None else index
+    names = sorted({normalize_drug_name(name) for name in medicine_names} - {''})
+    found = []
+    for pair in combinations(names, 2):
+        found.extend(index.get(pair, ()))
+    found.sort(key=lambda hit: (SEVERITY_RANK.get(hit[0].casefold(), 3), hit[2].casefold(), hit[3].casefold()))
+    return found
+
+
+def interaction_warning_text(interactions):
+    """One line per interaction, or None when there are none."""
+    if not interactions:
+        return None
+    lines = []
+    for severity, description, drug1, drug2 in interactions:
+        label = f"{drug1} + {drug2}"
+        if severity:
+            label += f" ({severity})"
+        lines.append(f"{label}: {description}")
+    return '\n'.join(lines)
+
+
+def check_prescription(prescription, save=True, index=None):
+    """
+    Recompute `interaction_warning` for `prescription` from its current items.
+    An empty prescription is left pending validation.
+    """
+    names = list(prescription.items.values_list('medicine__name', flat=True)) if prescription.pk else []
+    interactions = find_interactions(names, index=index)
+    prescription.interaction_warning = interaction_warning_text(interactions)
+    prescription.is_validated = bool(names)
+    if save:
+        prescription.save(update_fields=['is_validated', 'interaction_warning'])
+    return interactions
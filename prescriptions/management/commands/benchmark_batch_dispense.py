@@ -0,0 +1,82 @@
+import json
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from Medicine_inventory.models import Medicine
+from prescriptions.models import Doctor, Patient, Prescription
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares dispensing a prescription one add_prescription_item POST (and '
+        'detail page redirect) at a time with one batch-dispense JSON request. '
+        'All rows are created inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=20)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        items, rounds = options['items'], options['rounds']
+        client = Client()
+        with override_settings(ALLOWED_HOSTS=['testserver']), transaction.atomic():
+            medicines = self._seed(items)
+            one_by_one = self._measure(rounds, lambda prescription: self._one_by_one(client, prescription, medicines))
+            batched = self._measure(rounds, lambda prescription: self._batched(client, prescription, medicines))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{items} items per prescription, {rounds} prescriptions each")
+        self.stdout.write(f"{'':>12} {'ms / prescription':>18} {'queries':>9}")
+        for label, (ms, queries) in (('one by one', one_by_one), ('batched', batched)):
+            self.stdout.write(f"{label:>12} {ms:>18.1f} {queries:>9}")
+
+    def _seed(self, items):
+        today = date.today()
+        # Two batches per medicine, so FEFO has to pick the earlier expiry
+        Medicine.objects.bulk_create([
+            Medicine(
+                name=f"Bench {i}", brand='Bench', category='Analgesic', dosage='10mg',
+                quantity_in_stock=10_000, manufacture_date=today - timedelta(days=365),
+                expiry_date=today + timedelta(days=30 + 30 * batch), batch_number=f"BENCH-DISPENSE-{i:04d}-{batch}",
+                supplier='Bench',
+            )
+            for i in range(items) for batch in range(2)
+        ])
+        self.patient = Patient.objects.create(first_name='Bench', last_name='Patient', date_of_birth=date(1990, 1, 1))
+        self.doctor = Doctor.objects.create(first_name='Bench', last_name='Doctor', medical_code='BENCH-DISPENSE')
+        return list(Medicine.objects.filter(batch_number__endswith='-0', name__startswith='Bench ').order_by('pk'))
+
+    def _measure(self, rounds, dispense):
+        elapsed, queries = 0.0, 0
+        for _ in range(rounds):
+            prescription = Prescription.objects.create(patient=self.patient, doctor=self.doctor)
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                dispense(prescription)
+                elapsed += time.perf_counter() - start
+            queries += len(captured)
+        return elapsed * 1000 / rounds, queries // rounds
+
+    @staticmethod
+    def _one_by_one(client, prescription, medicines):
+        url = reverse('add_prescription_item', args=[prescription.pk])
+        for medicine in medicines:
+            client.post(url, {
+                'medicine': medicine.pk, 'requested_quantity': 3, 'dosage': '1 tablet', 'duration': '5 days',
+            }, follow=True)
+
+    @staticmethod
+    def _batched(client, prescription, medicines):
+        body = {'items': [
+            {'medicine': medicine.pk, 'requested_quantity': 3, 'dosage': '1 tablet', 'duration': '5 days'}
+            for medicine in medicines
+        ]}
+        client.post(reverse('dispense_prescription_items', args=[prescription.pk]),
+                    json.dumps(body), content_type='application/json')
@@ -0,0 +1,83 @@
+import random
+import statistics
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from prescriptions.models import Patient
+from prescriptions.search import PATIENT_FTS_TABLE, _fts_search, _indexed_search, _terms, rebuild_patient_fts
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'Kasun', 'Nimali',
+               'Saman', 'Dilani', 'Ruwan', 'Chathura', 'Amaya', 'Tharindu', 'Émile', 'Zoë', 'Ishara', 'Nuwan']
+LAST_NAMES = ['Smith', 'Johnson', 'Perera', 'Fernando', 'Silva', 'Jayasuriya', 'Williams', 'Brown', 'Bandara',
+              'Wickramasinghe', 'Dissanayake', 'Rajapaksa', 'Gunawardena', 'Herath', 'Kumara', 'Müller']
+QUERIES = ['per', 'john smi', 'wickram', '07712', 'nimali.f', 'zzq']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the old icontains patient search with the indexed prefix search '
+        'and the FTS5 index at increasing table sizes. All rows are created inside '
+        'a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[100000, 1000000])
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=10)
+
+    def handle(self, *args, **options):
+        has_fts = PATIENT_FTS_TABLE in connection.introspection.table_names()
+        page_size = options['page_size']
+        self.stdout.write(f"{'rows':>8} {'query':>10} {'icontains (ms)':>15} {'indexed (ms)':>13} {'fts5 (ms)':>10}")
+        for size in options['sizes']:
+            with transaction.atomic():
+                self._seed(size)
+                if has_fts:
+                    rebuild_patient_fts()
+                for query in QUERIES:
+                    terms = _terms(query)
+                    legacy = self._median(lambda: list(self._legacy(query)[:page_size]), options['runs'])
+                    indexed = self._median(
+                        lambda: list(_indexed_search(terms, Patient.objects.all())[:page_size]), options['runs']
+                    )
+                    fts = self._median(
+                        lambda: list(_fts_search(terms, Patient.objects.all())[:page_size]), options['runs']
+                    ) if has_fts else float('nan')
+                    self.stdout.write(f"{size:>8} {query:>10} {legacy:>15.1f} {indexed:>13.1f} {fts:>10.1f}")
+                transaction.set_rollback(True)
+
+    @staticmethod
+    def _legacy(query):
+        # The search PatientListView ran before prescriptions.search
+        patients = Patient.objects.all()
+        return patients.filter(first_name__icontains=query) | patients.filter(last_name__icontains=query)
+
+    def _seed(self, size, chunk=10000):
+        rng = random.Random(size)
+        for start in range(0, size, chunk):
+            batch = []
+            for i in range(start, min(start + chunk, size)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                patient = Patient(
+                    first_name=first,
+                    last_name=f"{last}{i % 997 or ''}",
+                    date_of_birth=date(1950 + i % 60, 1 + i % 12, 1 + i % 28),
+                    contact_number=f"077{rng.randint(0, 9999999):07d}",
+                    email=f"{first.lower()}.{last.lower()}{i}@example.com",
+                )
+                # bulk_create skips save(), so fill the search columns by hand
+                patient.update_search_fields()
+                batch.append(patient)
+            Patient.objects.bulk_create(batch)
+
+    @staticmethod
+    def _median(func, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
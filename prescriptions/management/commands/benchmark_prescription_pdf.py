@@ -0,0 +1,98 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.loader import render_to_string
+from weasyprint import HTML
+
+from Medicine_inventory.models import Medicine
+from Medicine_inventory.pdf_assets import asset_url_fetcher, read_asset
+from prescriptions.models import Doctor, Patient, Prescription, PrescriptionItem
+from prescriptions.pdf import PRESCRIPTION_STYLESHEET, render_prescription_pdf
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares rendering prescription PDFs with the stylesheet inlined in every '
+        'document against the shared precompiled stylesheet, at increasing item '
+        'counts. All rows are created inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', nargs='+', type=int, default=[1, 10, 100])
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        runs = options['runs']
+        self.stdout.write(f"{'items':>6} {'inline css (ms)':>16} {'cached css (ms)':>16} {'speedup':>8}")
+        for count in options['items']:
+            with transaction.atomic():
+                prescription = self._seed(count)
+                # Warm both paths once so template loading is not part of the timing
+                self._render_inline(prescription)
+                render_prescription_pdf(prescription)
+                inline = self._median(lambda: self._render_inline(prescription), runs)
+                cached = self._median(lambda: render_prescription_pdf(prescription), runs)
+                transaction.set_rollback(True)
+            self.stdout.write(f"{count:>6} {inline:>16.1f} {cached:>16.1f} {inline / cached:>7.2f}x")
+
+    def _seed(self, count):
+        today = date.today()
+        patient = Patient.objects.create(first_name='Bench', last_name='Patient', date_of_birth=date(1990, 1, 1))
+        doctor = Doctor.objects.create(first_name='Bench', last_name='Doctor', medical_code='BENCH-PDF')
+        prescription = Prescription.objects.create(patient=patient, doctor=doctor, notes='Benchmark prescription')
+        medicines = Medicine.objects.bulk_create([
+            Medicine(
+                name=f"Bench {i}",
+                brand='Bench',
+                category='Analgesic',
+                dosage='10mg',
+                selling_price=9.99,
+                quantity_in_stock=100,
+                manufacture_date=today - timedelta(days=365),
+                expiry_date=today + timedelta(days=365),
+                batch_number=f"BENCH-PDF-{i:05d}",
+                supplier='Bench',
+            )
+            for i in range(count)
+        ])
+        PrescriptionItem.objects.bulk_create([
+            PrescriptionItem(
+                prescription=prescription,
+                medicine=medicine,
+                dosage='1 tablet twice daily',
+                duration='7 days',
+                requested_quantity=2,
+                dispensed_quantity=2,
+            )
+            for medicine in medicines
+        ])
+        return (
+            Prescription.objects.select_related('patient', 'doctor')
+            .prefetch_related('items__medicine').with_total_cost()
+            .get(pk=prescription.pk)
+        )
+
+    @staticmethod
+    def _render_inline(prescription):
+        # What the view did before: the stylesheet travels inside every document
+        # and WeasyPrint parses it again for each render.
+        html = render_to_string('prescriptions/prescription_pdf.html', {
+            'prescription': prescription,
+            'items': prescription.items.all(),
+            'total_cost': prescription.total_cost,
+        })
+        css, _ = read_asset(PRESCRIPTION_STYLESHEET)
+        html = html.replace('</head>', f"<style>{css.decode('utf-8')}</style></head>", 1)
+        return HTML(string=html, url_fetcher=asset_url_fetcher()).write_pdf()
+
+    @staticmethod
+    def _median(func, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,46 @@
+import csv
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from prescriptions.interaction_import import (
+    IMPORT_CHUNK_SIZE, IMPORT_FORMATS, guess_format, import_interactions, read_interactions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports drug interactions from a CSV, JSON (array) or JSON Lines file with '
+        'drug1_name, drug2_name, interaction_description and severity columns. '
+        'Existing pairs, in either order, are updated.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS,
+                            help='Defaults to the file extension (.csv, .json, .jsonl/.ndjson).')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument('--revalidate', action='store_true',
+                            help='Re-check all prescriptions against the new interactions afterwards.')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or guess_format(options['path'])
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError(f"Cannot tell the format of {options['path']}; pass --format.")
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        start = time.perf_counter()
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                imported, skipped = import_interactions(read_interactions(f, file_format), options['chunk_size'])
+        except (OSError, ValueError, csv.Error) as e:
+            raise CommandError(f'Import failed, nothing was saved: {e}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} interaction(s), skipped {skipped} incomplete row(s), "
+            f"in {time.perf_counter() - start:.1f}s."
+        ))
+
+        if options['revalidate']:
+            call_command('revalidate_prescriptions', '--all', stdout=self.stdout, stderr=self.stderr)
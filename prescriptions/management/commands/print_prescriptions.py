@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from prescriptions.batch import (
+    BATCH_FORMATS, DEFAULT_WORKERS, batch_prescriptions, render_prescription_merged_pdf, render_prescription_zip,
+)
+
+
+def _date(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        'Prints a batch of prescriptions, selected by id or prescription date, into '
+        'a zip of PDFs (rendered in parallel worker processes) or one merged PDF.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='File to write, e.g. prescriptions.zip')
+        parser.add_argument('--ids', nargs='+', type=int, default=[])
+        parser.add_argument('--from', dest='date_from', type=_date, help='First prescription date (YYYY-MM-DD).')
+        parser.add_argument('--to', dest='date_to', type=_date, help='Last prescription date (YYYY-MM-DD).')
+        parser.add_argument('--format', choices=BATCH_FORMATS, default='zip')
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                            help='Processes rendering the zip. 0 or 1 renders in this process.')
+
+    def handle(self, *args, **options):
+        if not (options['ids'] or options['date_from'] or options['date_to']):
+            raise CommandError('Pass --ids or a --from/--to date range.')
+
+        prescriptions = list(batch_prescriptions(options['ids'], options['date_from'], options['date_to']))
+        if not prescriptions:
+            raise CommandError('No prescriptions match.')
+
+        start = time.perf_counter()
+        if options['format'] == 'pdf':
+            data = render_prescription_merged_pdf(prescriptions)
+        else:
+            data = render_prescription_zip(prescriptions, options['workers'])
+        with open(options['output'], 'wb') as f:
+            f.write(data)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(prescriptions)} prescription(s) to {options['output']} "
+            f"in {time.perf_counter() - start:.1f}s."
+        ))
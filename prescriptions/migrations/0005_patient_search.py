@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+from prescriptions.normalization import normalize_digits, normalize_text
+
+FTS_TABLE = 'prescriptions_patient_fts'
+
+
+def fill_search_fields(apps, schema_editor):
+    Patient = apps.get_model('prescriptions', 'Patient')
+    patients = list(Patient.objects.all())
+    for patient in patients:
+        patient.search_first_name = normalize_text(patient.first_name)
+        patient.search_last_name = normalize_text(patient.last_name)
+        patient.search_contact = normalize_digits(patient.contact_number)
+        patient.search_email = normalize_text(patient.email)
+    Patient.objects.bulk_update(
+        patients, ['search_first_name', 'search_last_name', 'search_contact', 'search_email'], batch_size=1000
+    )
+
+
+def create_fts_table(apps, schema_editor):
+    # Optional: only SQLite builds with FTS5 get the full-text index
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, contact, email, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, contact, email) "
+            "SELECT id, search_first_name || ' ' || search_last_name, search_contact, search_email "
+            "FROM prescriptions_patient"
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prescriptions', '0004_patient_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='search_contact',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='search_email',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='search_first_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='search_last_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_search_fields, migrations.RunPython.noop),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
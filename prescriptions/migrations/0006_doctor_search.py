@@ -0,0 +1,38 @@
+from django.db import migrations
+
+FTS_TABLE = 'prescriptions_doctor_fts'
+
+
+def create_fts_table(apps, schema_editor):
+    # Optional: only SQLite builds with FTS5 get the full-text index
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, specialization, medical_code, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, specialization, medical_code) "
+            "SELECT id, first_name || ' ' || last_name, COALESCE(specialization, ''), medical_code "
+            "FROM prescriptions_doctor"
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prescriptions', '0005_patient_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
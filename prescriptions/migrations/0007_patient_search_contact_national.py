@@ -0,0 +1,35 @@
+from django.db import migrations
+
+from prescriptions.normalization import normalize_phone
+
+FTS_TABLE = 'prescriptions_patient_fts'
+
+
+def store_national_numbers(apps, schema_editor):
+    Patient = apps.get_model('prescriptions', 'Patient')
+    patients = list(Patient.objects.all())
+    for patient in patients:
+        patient.search_contact = normalize_phone(patient.contact_number)
+    Patient.objects.bulk_update(patients, ['search_contact'], batch_size=1000)
+
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite' or FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, contact, email) "
+            "SELECT id, search_first_name || ' ' || search_last_name, search_contact, search_email "
+            "FROM prescriptions_patient"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prescriptions', '0006_doctor_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(store_national_numbers, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,10 @@ from django.db import models
 from django.urls import reverse
 from Medicine_inventory.models import Medicine
 from datetime import date
+from decimal import Decimal
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from .normalization import normalize_phone, normalize_text
 
 # Model for patients.
 # This model stores basic information about a patient.
@@ -13,6 +17,13 @@ class Patient(models.Model):
     contact_number = models.CharField(max_length=20, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
     email = models.EmailField(blank=True, null=True) 
+
+    # Normalised copies of the searchable fields (see prescriptions.search).
+    # Kept in step by save(); indexed so prefix searches are range scans, not full scans.
+    search_first_name = models.CharField(max_length=100, editable=False, db_index=True, default='')
+    search_last_name = models.CharField(max_length=100, editable=False, db_index=True, default='')
+    search_contact = models.CharField(max_length=20, editable=False, db_index=True, default='')
+    search_email = models.CharField(max_length=254, editable=False, db_index=True, default='')
     
     class Meta:
         # Orders patients by their last name, then first name, for consistent listing.
@@ -22,6 +33,20 @@ class Patient(models.Model):
         # String representation of the Patient object, useful for admin and debugging.
         return f"{self.first_name} {self.last_name}"
 
+    def update_search_fields(self):
+        """Refresh the normalised search columns; call before bulk_create, which skips save()."""
+        self.search_first_name = normalize_text(self.first_name)
+        self.search_last_name = normalize_text(self.last_name)
+        self.search_contact = normalize_phone(self.contact_number)
+        self.search_email = normalize_text(self.email)
+
+    def save(self, *args, **kwargs):
+        self.update_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_first_name', 'search_last_name', 'search_contact', 'search_email'}
+        super().save(*args, **kwargs)
+
 # Model for doctors.
 # This model stores basic information about a doctor.
 class Doctor(models.Model):
@@ -40,6 +65,29 @@ class Doctor(models.Model):
         # String representation of the Doctor object, including the new medical_code.
         return f"Dr. {self.first_name} {self.last_name} (Code: {self.medical_code})"
 
+# Queryset helpers for prescriptions.
+# Computes totals in SQL so pages of prescriptions don't load every item and medicine.
+class PrescriptionQuerySet(models.QuerySet):
+    def with_total_cost(self):
+        """
+        Annotate `items_total`: the sum of dispensed_quantity * medicine.selling_price
+        over the prescription's items, computed by a correlated subquery (so it can be
+        combined with other aggregates without double counting).
+        """
+        money = DecimalField(max_digits=12, decimal_places=2)
+        totals = (
+            PrescriptionItem.objects.filter(prescription=OuterRef('pk'))
+            .values('prescription')
+            .annotate(total=Sum(ExpressionWrapper(
+                F('dispensed_quantity') * F('medicine__selling_price'), output_field=money,
+            )))
+            .values('total')
+        )
+        return self.annotate(
+            items_total=Coalesce(Subquery(totals, output_field=money), Value(Decimal('0.00')), output_field=money)
+        )
+
+
 # Model for a prescription.
 # This is the main prescription record, linking a patient and a doctor.
 class Prescription(models.Model):
@@ -60,6 +108,8 @@ class Prescription(models.Model):
     # New field to track if the prescription has been paid for.
     is_paid = models.BooleanField(default=False)
 
+    objects = PrescriptionQuerySet.as_manager()
+
     class Meta:
         # Orders prescriptions by date in descending order (most recent first).
         ordering = ['-prescription_date']
@@ -77,8 +127,11 @@ class Prescription(models.Model):
     def total_cost(self):
         """
         Calculates the total cost of the prescription by summing up the total
-        price of each associated PrescriptionItem.
+        price of each associated PrescriptionItem. Uses the `items_total`
+        annotation from with_total_cost() when present instead of loading the items.
         """
+        if 'items_total' in self.__dict__:
+            return self.items_total
         return sum(item.total_price for item in self.items.all())
 
 
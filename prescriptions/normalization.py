@@ -0,0 +1,35 @@
+"""
+Normalisation shared by the stored search columns and incoming search queries,
+so both sides compare equal byte for byte and plain B-tree indexes can be used.
+"""
+import re
+import unicodedata
+
+# Numbers are written both locally ('077 123 4567') and with the country code
+# ('+94 77 123 4567'); both are stored and searched as the national number
+COUNTRY_CODE = '94'
+
+
+def normalize_text(value):
+    """Casefold and strip accents: 'Émile ' -> 'emile'."""
+    value = unicodedata.normalize('NFKD', value or '')
+    return ''.join(c for c in value if not unicodedata.combining(c)).casefold().strip()
+
+
+def normalize_digits(value):
+    """Keep only the digits of a phone number: '+94 (77) 123-4567' -> '94771234567'."""
+    return re.sub(r'\D', '', value or '')
+
+
+def normalize_phone(value):
+    """National digits of a phone number: '+94 77 123-4567' and '077 123 4567' -> '771234567'."""
+    digits = normalize_digits(value)
+    if digits.startswith('00'):
+        # International call prefix
+        digits = digits[2:]
+    if digits.startswith(COUNTRY_CODE):
+        return digits[len(COUNTRY_CODE):]
+    if digits.startswith('0'):
+        # Trunk prefix
+        return digits[1:]
+    return digits
@@ -0,0 +1,64 @@
+from django.template.loader import render_to_string
+from weasyprint import HTML
+
+from Medicine_inventory.pdf_assets import asset_url_fetcher, stylesheet
+from .pdf_cache import content_hash, template_version
+
+PRESCRIPTION_TEMPLATE = 'prescriptions/prescription_pdf.html'
+PRESCRIPTION_STYLESHEET = 'pdf/prescription.css'
+
+
+def item_rows(prescription):
+    """The item fields the prescription and invoice PDFs print, in table order."""
+    return [
+        [item.pk, item.medicine.name, item.medicine.batch_number, item.medicine.description,
+         item.medicine.selling_price, item.dosage, item.dispensed_quantity]
+        for item in prescription.items.all()
+    ]
+
+
+def prescription_fingerprint(prescription):
+    """Hash of everything the prescription PDF shows; used as its cache key and ETag."""
+    patient, doctor = prescription.patient, prescription.doctor
+    return content_hash({
+        'version': template_version(PRESCRIPTION_TEMPLATE, PRESCRIPTION_STYLESHEET),
+        'prescription': [prescription.pk, prescription.prescription_date, prescription.notes, prescription.is_paid],
+        'patient': [patient.first_name, patient.last_name, patient.date_of_birth],
+        'doctor': [doctor.first_name, doctor.last_name, doctor.medical_code, doctor.specialization],
+        'items': item_rows(prescription),
+    })
+
+
+def prescription_html(prescription):
+    """
+    Fill the prescription PDF template. Expects `prescription` to come with
+    items__medicine prefetched and with_total_cost() applied, otherwise the rows
+    and the total each cost extra queries.
+    """
+    return render_to_string(PRESCRIPTION_TEMPLATE, {
+        'prescription': prescription,
+        'items': prescription.items.all(),
+        'total_cost': prescription.total_cost,
+    })
+
+
+def prescription_document(html):
+    """Lay out filled-in prescription HTML; the returned Document can be merged with others."""
+    return HTML(string=html, url_fetcher=asset_url_fetcher()).render(
+        stylesheets=[stylesheet(PRESCRIPTION_STYLESHEET)],
+    )
+
+
+def html_to_prescription_pdf(html):
+    """
+    Turn filled-in prescription HTML into PDF bytes. Needs no database access,
+    so batch printing runs it in worker processes.
+    """
+    return HTML(string=html, url_fetcher=asset_url_fetcher()).write_pdf(
+        stylesheets=[stylesheet(PRESCRIPTION_STYLESHEET)],
+    )
+
+
+def render_prescription_pdf(prescription):
+    """Render a prescription to PDF bytes."""
+    return html_to_prescription_pdf(prescription_html(prescription))
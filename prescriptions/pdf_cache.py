@@ -0,0 +1,87 @@
+"""
+On-disk cache of rendered prescription and invoice PDFs.
+
+Files are content-addressed: each name is a hash of everything the document
+shows plus the template and stylesheet it was rendered with, so a changed
+prescription can never be served an old file. The same hash is sent as the
+ETag, letting browsers revalidate without downloading the PDF again. Signals
+remove a document's superseded files when its rows change.
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse
+from django.template.loader import get_template
+from django.utils.cache import get_conditional_response
+
+from Medicine_inventory.pdf_assets import read_asset
+
+
+def template_version(template_name, stylesheet_path):
+    """Short hash of a PDF template and its stylesheet; changes whenever either file does."""
+    source = get_template(template_name).template.source
+    css, _ = read_asset(stylesheet_path)
+    return hashlib.sha256(source.encode('utf-8') + css).hexdigest()[:16]
+
+
+def content_hash(data):
+    """Stable hash of a JSON-serialisable description of a document."""
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _document_dir(kind, pk):
+    return os.path.join(settings.PDF_CACHE_ROOT, kind, str(pk))
+
+
+def cached_pdf_path(kind, pk, fingerprint):
+    return os.path.join(_document_dir(kind, pk), f'{fingerprint}.pdf')
+
+
+def store_pdf(path, pdf):
+    """Write `pdf` to `path` via a temporary file and rename, so readers never see a partial PDF."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+    except OSError:
+        # The directory was invalidated under us; the caller still has the bytes.
+        pass
+
+
+def cached_pdf_response(request, kind, pk, fingerprint, render, filename):
+    """
+    Serve the PDF identified by `fingerprint`, calling `render()` only when it is
+    not on disk yet. Answers 304 when the client already holds this version.
+    """
+    etag = f'"{fingerprint}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+        return response
+
+    path = cached_pdf_path(kind, pk, fingerprint)
+    try:
+        pdf_file = open(path, 'rb')
+    except FileNotFoundError:
+        pdf = render()
+        store_pdf(path, pdf)
+        pdf_file = io.BytesIO(pdf)
+
+    response = FileResponse(pdf_file, as_attachment=True, filename=filename, content_type='application/pdf')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def invalidate_pdf(kind, pk):
+    """Drop every cached version of one document."""
+    shutil.rmtree(_document_dir(kind, pk), ignore_errors=True)
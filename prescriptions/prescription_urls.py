@@ -15,6 +15,8 @@ urlpatterns = [
     path('patients/<int:pk>/edit/', views.PatientUpdateView.as_view(), name='patient_update'),
     # Delete a specific patient
     path('patients/<int:pk>/delete/', views.PatientDeleteView.as_view(), name='patient_delete'),
+    # JSON lookup for the patient filter/typeahead
+    path('patients/autocomplete/', views.patient_autocomplete, name='patient_autocomplete'),
 
     # --- Doctor URLs ---
     # List all doctors
@@ -27,6 +29,10 @@ urlpatterns = [
     path('doctors/<int:pk>/edit/', views.DoctorUpdateView.as_view(), name='doctor_update'),
     # Delete a specific doctor
     path('doctors/<int:pk>/delete/', views.DoctorDeleteView.as_view(), name='doctor_delete'),
+    # JSON lookup for the doctor filter/typeahead
+    path('doctors/autocomplete/', views.doctor_autocomplete, name='doctor_autocomplete'),
+    # Paged search of dispensable medicine batches for the item form
+    path('medicines/search/', views.medicine_search, name='medicine_search'),
 
     # --- Prescription URLs ---
     # List all prescriptions
@@ -47,11 +53,15 @@ urlpatterns = [
     path('prescription/<int:pk>/items/<int:item_pk>/edit/', views.update_prescription_item, name='update_prescription_item'),
     # Delete a specific medicine item from a prescription
     path('prescription/<int:pk>/items/<int:item_pk>/delete/', views.delete_prescription_item, name='delete_prescription_item'),
+    # Dispense several items at once (JSON in, JSON out)
+    path('prescription/<int:pk>/items/dispense/', views.dispense_prescription_items, name='dispense_prescription_items'),
 
     # --- PDF Generation URL ---
     # Generate PDF for a specific prescription
     path('prescription/<int:pk>/pdf/', views.generate_prescription_pdf, name='generate_prescription_pdf'),
     path('prescription/<int:pk>/mark_paid/', views.mark_prescription_as_paid, name='mark_prescription_as_paid'),
+    # Print many prescriptions at once (?ids=1,2,3 or ?date_from=&date_to=, format=zip|pdf)
+    path('prescription/print/', views.print_prescriptions, name='print_prescriptions'),
     
     # --- DrugInteraction URLs (for future admin/management, optional for now) ---
     # You might add views for DrugInteraction later if needed for non-admin CRUD.
@@ -0,0 +1,260 @@
+"""
+Patient and doctor search.
+
+Patients
+--------
+
+Every whitespace-separated term of the query must be a prefix of one of the
+patient's first name, last name, email or phone number. Matches are ranked
+(exact name > last-name prefix > first-name prefix > contact details). Phone
+numbers are compared in national form, so '0771…' and '+94 771…' find the same
+patient, and a query of only phone characters is taken as one number.
+
+Two backends implement this:
+
+* the normalised, indexed ``search_*`` columns on Patient, queried as index
+  range scans (``col >= 'smi' AND col < 'smj'``), which works on any database;
+* an SQLite FTS5 table (``prescriptions_patient_fts``), kept in sync by the
+  signals in prescriptions.signals. bm25() picks the best MAX_FTS_RESULTS
+  candidates, which are then ranked the same way. It is used when
+  settings.PATIENT_SEARCH_FTS is true and the table exists, and also matches
+  words inside email addresses.
+
+Doctors
+-------
+A query equal to a medical code is answered from the unique index on
+``medical_code`` alone. Anything else goes to an SQLite FTS5 table over name,
+specialization and code (``prescriptions_doctor_fts``, maintained by the Doctor
+signals, enabled by settings.DOCTOR_SEARCH_FTS), or to prefix filters on other
+databases.
+
+Medicines
+---------
+Only batches that can be dispensed (in stock, not expired) are offered. Names
+keep their display case, so a prefix is matched as a few case variants, each a
+range scan on the name column of medicine_fefo_idx.
+"""
+import re
+from datetime import date
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from Medicine_inventory.models import Medicine
+from .models import Doctor, Patient
+from .normalization import normalize_digits, normalize_phone, normalize_text
+
+PATIENT_FTS_TABLE = 'prescriptions_patient_fts'
+DOCTOR_FTS_TABLE = 'prescriptions_doctor_fts'
+# Phone prefixes shorter than this match too much to be useful
+MIN_CONTACT_PREFIX = 3
+MAX_TERMS = 5
+MAX_FTS_RESULTS = 500
+PHONE_RE = re.compile(r'[\d\s()+\-.]+')
+
+_fts_tables = {}
+
+
+def _terms(query):
+    # A phone number is typed with spaces ('077 123 4567') but searched as one term
+    if PHONE_RE.fullmatch((query or '').strip()) and _phone_prefix(query):
+        return [normalize_digits(query)]
+    return [term for term in normalize_text(query).split() if term][:MAX_TERMS]
+
+
+def _prefix(field, prefix):
+    """`field` starts with `prefix`, written as a range so a plain B-tree index applies."""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+def _phone_prefix(term):
+    """`term` as a national phone number prefix, or None if it is too short to be one."""
+    if len(normalize_digits(term)) < MIN_CONTACT_PREFIX:
+        return None
+    return normalize_phone(term) or None
+
+
+def _term_filter(term):
+    match = _prefix('search_first_name', term) | _prefix('search_last_name', term) | _prefix('search_email', term)
+    phone = _phone_prefix(term)
+    if phone:
+        match |= _prefix('search_contact', phone)
+    return match
+
+
+def _term_rank(term):
+    return Case(
+        When(Q(search_last_name=term) | Q(search_first_name=term), then=Value(4)),
+        When(_prefix('search_last_name', term), then=Value(3)),
+        When(_prefix('search_first_name', term), then=Value(2)),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+
+
+def _ranked(terms, queryset):
+    rank = _term_rank(terms[0])
+    for term in terms[1:]:
+        rank = rank + _term_rank(term)
+    return queryset.annotate(search_rank=rank).order_by('-search_rank', 'search_last_name', 'search_first_name', 'pk')
+
+
+def _indexed_search(terms, queryset):
+    for term in terms:
+        queryset = queryset.filter(_term_filter(term))
+    return _ranked(terms, queryset)
+
+
+# --- FTS5 backend ---
+
+def fts_enabled(table):
+    setting = 'PATIENT_SEARCH_FTS' if table == PATIENT_FTS_TABLE else 'DOCTOR_SEARCH_FTS'
+    if not getattr(settings, setting, False) or connection.vendor != 'sqlite':
+        return False
+    key = (connection.settings_dict['NAME'], table)
+    if key not in _fts_tables:
+        _fts_tables[key] = table in connection.introspection.table_names()
+    return _fts_tables[key]
+
+
+def _fts_ids(table, match, weights):
+    """Rowids of the best MAX_FTS_RESULTS matches, by bm25() with per-column `weights`."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s '
+            f'ORDER BY bm25({table}, {weights}) LIMIT %s',
+            [match, MAX_FTS_RESULTS],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _upsert_fts_row(table, pk, columns):
+    names = ', '.join(columns)
+    placeholders = ', '.join(['%s'] * len(columns))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [pk])
+        cursor.execute(
+            f'INSERT INTO {table} (rowid, {names}) VALUES (%s, {placeholders})', [pk, *columns.values()]
+        )
+
+
+def unindex(table, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [pk])
+
+
+def _fts_token(term):
+    # FTS5 splits on punctuation, so phone numbers are stored and queried as bare digits
+    if PHONE_RE.fullmatch(term) and _phone_prefix(term):
+        term = _phone_prefix(term)
+    return '"' + term.replace('"', '""') + '"*'
+
+
+def _fts_search(terms, queryset):
+    ids = _fts_ids(PATIENT_FTS_TABLE, ' '.join(_fts_token(term) for term in terms), '10.0, 2.0, 1.0')
+    return _ranked(terms, queryset.filter(pk__in=ids))
+
+
+def index_patient(patient):
+    """Insert or replace one patient's FTS row."""
+    _upsert_fts_row(PATIENT_FTS_TABLE, patient.pk, {
+        'name': f'{patient.search_first_name} {patient.search_last_name}',
+        'contact': patient.search_contact,
+        'email': patient.search_email,
+    })
+
+
+def rebuild_patient_fts():
+    """Repopulate the patient FTS table from the search columns, e.g. after bulk_create."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {PATIENT_FTS_TABLE}')
+        cursor.execute(
+            f"INSERT INTO {PATIENT_FTS_TABLE} (rowid, name, contact, email) "
+            f"SELECT id, search_first_name || ' ' || search_last_name, search_contact, search_email "
+            f"FROM {Patient._meta.db_table}"
+        )
+
+
+def search_patients(query, queryset=None, limit=None):
+    """
+    Patients matching every term of `query` by prefix, best matches first,
+    optionally cut to the first `limit` rows.
+    """
+    queryset = Patient.objects.all() if queryset is None else queryset
+    terms = _terms(query)
+    if not terms:
+        return queryset.none()
+    if fts_enabled(PATIENT_FTS_TABLE):
+        results = _fts_search(terms, queryset)
+    else:
+        results = _indexed_search(terms, queryset)
+    return results[:limit] if limit else results
+
+
+# --- Doctors ---
+
+def find_doctor_by_code(medical_code):
+    """
+    The doctor with this medical code. Tries the code as typed and upper-cased
+    against the unique index before falling back to a case-insensitive scan.
+    """
+    medical_code = (medical_code or '').strip()
+    if not medical_code:
+        return None
+    doctor = Doctor.objects.filter(medical_code__in={medical_code, medical_code.upper()}).first()
+    if doctor is None:
+        doctor = Doctor.objects.filter(medical_code__iexact=medical_code).first()
+    return doctor
+
+
+def index_doctor(doctor):
+    """Insert or replace one doctor's FTS row."""
+    _upsert_fts_row(DOCTOR_FTS_TABLE, doctor.pk, {
+        'name': f'{doctor.first_name} {doctor.last_name}',
+        'specialization': doctor.specialization or '',
+        'medical_code': doctor.medical_code,
+    })
+
+
+def search_doctors(query, queryset=None, limit=None):
+    """
+    Doctors whose name, specialization or medical code start with every term of
+    `query`; an exact medical code returns just that doctor.
+    """
+    queryset = Doctor.objects.all() if queryset is None else queryset
+    query = (query or '').strip()
+    terms = [term for term in query.split() if term][:MAX_TERMS]
+    if not terms:
+        return queryset.none()
+
+    exact = queryset.filter(medical_code=query)
+    if exact.exists():
+        return exact
+
+    if fts_enabled(DOCTOR_FTS_TABLE):
+        match = ' '.join('"' + normalize_text(term).replace('"', '""') + '"*' for term in terms)
+        results = queryset.filter(pk__in=_fts_ids(DOCTOR_FTS_TABLE, match, '5.0, 1.0, 3.0'))
+    else:
+        results = queryset
+        for term in terms:
+            results = results.filter(
+                Q(first_name__istartswith=term) | Q(last_name__istartswith=term)
+                | Q(specialization__istartswith=term) | Q(medical_code__istartswith=term)
+            )
+    results = results.order_by('last_name', 'first_name', 'pk')
+    return results[:limit] if limit else results
+
+
+def search_medicines(query, today=None):
+    """Dispensable batches whose name starts with `query` (any of its usual casings)."""
+    today = today or date.today()
+    medicines = Medicine.objects.filter(quantity_in_stock__gt=0, expiry_date__gt=today)
+    query = query.strip()
+    if query:
+        match = Q()
+        for variant in {query, query.lower(), query.upper(), query.capitalize(), query.title()}:
+            match |= _prefix('name', variant)
+        medicines = medicines.filter(match)
+    return medicines
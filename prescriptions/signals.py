@@ -0,0 +1,61 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .interactions import invalidate_interaction_index
+from .models import Doctor, DrugInteraction, Patient, Prescription, PrescriptionItem
+from .pdf_cache import invalidate_pdf
+from .search import DOCTOR_FTS_TABLE, PATIENT_FTS_TABLE, fts_enabled, index_doctor, index_patient, unindex
+
+# Sent after items are written in bulk (no post_save), with `prescription_id`
+prescription_items_changed = Signal()
+
+
+@receiver(post_save, sender=Prescription)
+@receiver(post_delete, sender=Prescription)
+def invalidate_prescription_pdf(sender, instance, **kwargs):
+    """Notes, payment state or the prescription itself changed."""
+    invalidate_pdf('prescription', instance.pk)
+
+
+@receiver(post_save, sender=PrescriptionItem)
+@receiver(post_delete, sender=PrescriptionItem)
+def invalidate_prescription_pdf_for_item(sender, instance, **kwargs):
+    """Adding, editing or removing an item changes the printed table and total."""
+    invalidate_pdf('prescription', instance.prescription_id)
+
+
+@receiver(prescription_items_changed)
+def invalidate_prescription_pdf_for_items(sender, prescription_id, **kwargs):
+    invalidate_pdf('prescription', prescription_id)
+
+
+@receiver(post_save, sender=Patient)
+def index_patient_for_search(sender, instance, **kwargs):
+    """Keep the optional FTS5 patient index in step with the row."""
+    if fts_enabled(PATIENT_FTS_TABLE):
+        index_patient(instance)
+
+
+@receiver(post_delete, sender=Patient)
+def unindex_patient_for_search(sender, instance, **kwargs):
+    if fts_enabled(PATIENT_FTS_TABLE):
+        unindex(PATIENT_FTS_TABLE, instance.pk)
+
+
+@receiver(post_save, sender=Doctor)
+def index_doctor_for_search(sender, instance, **kwargs):
+    if fts_enabled(DOCTOR_FTS_TABLE):
+        index_doctor(instance)
+
+
+@receiver(post_delete, sender=Doctor)
+def unindex_doctor_for_search(sender, instance, **kwargs):
+    if fts_enabled(DOCTOR_FTS_TABLE):
+        unindex(DOCTOR_FTS_TABLE, instance.pk)
+
+
+@receiver(post_save, sender=DrugInteraction)
+@receiver(post_delete, sender=DrugInteraction)
+def reload_interaction_index(sender, instance, **kwargs):
+    """The next interaction check, in this and other processes, reloads the table."""
+    invalidate_interaction_index()
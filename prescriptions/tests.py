@@ -1,3 +1,487 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from Medicine_inventory.models import Medicine
+from Medicine_inventory.stock import fefo_batches
+from Medicine_inventory.tests import make_medicine
+from .batch import batch_prescriptions, render_prescription_zip
+from .models import Doctor, DrugInteraction, Patient, Prescription, PrescriptionItem
+from .pdf import prescription_html
+from .forms import PrescriptionForm, PrescriptionItemForm
+from . import interactions
+from .interaction_import import import_interactions, read_interactions
+from .interactions import find_interactions
+from .search import search_doctors, search_patients
+
+
+def create_prescription(item_count=1, tag="A"):
+    patient = Patient.objects.create(first_name="Jane", last_name="Doe", date_of_birth=date(1990, 1, 1))
+    doctor = Doctor.objects.create(first_name="John", last_name="Smith", medical_code=f"MC-{tag}")
+    prescription = Prescription.objects.create(patient=patient, doctor=doctor)
+    for i in range(item_count):
+        medicine = make_medicine(
+            f"BATCH-{tag}-{i:03d}", name=f"Paracetamol {i}", brand="Panadol", dosage="500mg",
+            selling_price=2.50, quantity_in_stock=100, supplier="ABC Pharma",
+        )
+        PrescriptionItem.objects.create(
+            prescription=prescription, medicine=medicine, dosage="1 tablet",
+            duration="5 days", requested_quantity=2, dispensed_quantity=2,
+        )
+    return prescription
+
+
+class PrescriptionTotalCostTest(TestCase):
+    def test_annotation_matches_python_total(self):
+        prescription = create_prescription(item_count=3)
+        expected = sum(item.total_price for item in prescription.items.all())
+        with self.assertNumQueries(1):
+            annotated = Prescription.objects.with_total_cost().get(pk=prescription.pk)
+            self.assertEqual(annotated.total_cost, expected)
+        empty = Prescription.objects.create(patient=prescription.patient, doctor=prescription.doctor)
+        self.assertEqual(Prescription.objects.with_total_cost().get(pk=empty.pk).total_cost, 0)
+
+    def test_pdf_and_detail_queries_do_not_grow_with_items(self):
+        cache_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_root, ignore_errors=True)
+        counts = []
+        with override_settings(PDF_CACHE_ROOT=cache_root):
+            for prescription in (create_prescription(1, tag="S"), create_prescription(10, tag="L")):
+                with CaptureQueriesContext(connection) as queries:
+                    detail = self.client.get(reverse("prescription_detail", args=[prescription.pk]))
+                    pdf = self.client.get(reverse("generate_prescription_pdf", args=[prescription.pk]))
+                self.assertEqual((detail.status_code, pdf.status_code), (200, 200))
+                counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class PrescriptionListViewTest(TestCase):
+    def list_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("prescription_list"), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        first = create_prescription(item_count=2)
+        _, small = self.list_queries()
+        for _ in range(11):
+            Prescription.objects.create(patient=first.patient, doctor=first.doctor)
+        _, full = self.list_queries()
+        self.assertEqual(small, full)
+        # Newest first, so the prescription with items is the last row of page 2
+        response, _ = self.list_queries(page=2)
+        row = list(response.context["prescriptions"])[-1]
+        self.assertEqual((row.pk, row.item_count, row.total_cost), (first.pk, 2, 10))
+
+        _, filtered = self.list_queries(patient=first.patient.pk, doctor=first.doctor.pk)
+        self.assertEqual(filtered, full + 2)
+
+    def test_autocomplete_matches_name_prefixes(self):
+        prescription = create_prescription()
+        response = self.client.get(reverse("patient_autocomplete"), {"q": "ja"})
+        self.assertEqual(response.json()["results"], [{"id": prescription.patient.pk, "label": "Jane Doe"}])
+        response = self.client.get(reverse("doctor_autocomplete"), {"q": "MC-"})
+        self.assertEqual([r["id"] for r in response.json()["results"]], [prescription.doctor.pk])
+        self.assertEqual(self.client.get(reverse("patient_autocomplete")).json()["results"], [])
+
+
+class PatientSearchTest(TestCase):
+    def setUp(self):
+        self.jane = Patient.objects.create(
+            first_name="Jane", last_name="Doe", date_of_birth=date(1990, 1, 1),
+            contact_number="+94 77 123 4567", email="jane.doe@example.com",
+        )
+        self.emile = Patient.objects.create(first_name="Émile", last_name="Dorsey", date_of_birth=date(1985, 5, 5))
+        self.dora = Patient.objects.create(first_name="Dora", last_name="Janeway", date_of_birth=date(1970, 3, 3))
+
+    def assertSearch(self, query, expected):
+        for fts in (False, True):
+            with self.subTest(query=query, fts=fts), override_settings(PATIENT_SEARCH_FTS=fts):
+                self.assertEqual(list(search_patients(query)), expected)
+
+    def test_prefix_terms_across_fields(self):
+        self.assertSearch("do", [self.jane, self.emile, self.dora])
+        self.assertSearch("jane do", [self.jane, self.dora])
+        self.assertSearch("emile", [self.emile])
+        self.assertSearch("9477", [self.jane])
+        self.assertSearch("oe", [])
+
+    def test_local_and_international_numbers_match_each_other(self):
+        self.dora.contact_number = "0712 345 678"
+        self.dora.save()
+        for query in ("0771", "077 123", "+94 77 1", "0094771", "771234"):
+            self.assertSearch(query, [self.jane])
+        for query in ("+94 71 2", "0712", "712345678"):
+            self.assertSearch(query, [self.dora])
+
+    def test_exact_name_outranks_prefix(self):
+        self.assertSearch("jane", [self.jane, self.dora])
+
+    def test_fts_index_follows_updates_and_deletes(self):
+        self.jane.last_name = "Smith"
+        self.jane.save()
+        self.dora.delete()
+        self.assertSearch("smi", [self.jane])
+        self.assertSearch("janew", [])
+
+
+class DoctorSearchTest(TestCase):
+    def setUp(self):
+        self.smith = Doctor.objects.create(first_name="John", last_name="Smith", specialization="Cardiology", medical_code="MD100")
+        self.perera = Doctor.objects.create(first_name="Anne", last_name="Perera", specialization="Paediatrics", medical_code="MD200")
+
+    def test_exact_medical_code_uses_fast_path(self):
+        for fts in (False, True):
+            with self.subTest(fts=fts), override_settings(DOCTOR_SEARCH_FTS=fts):
+                self.assertEqual(list(search_doctors("MD100")), [self.smith])
+                self.assertEqual(list(search_doctors("cardio")), [self.smith])
+                self.assertEqual(list(search_doctors("md")), [self.perera, self.smith])
+                self.assertEqual(list(search_doctors("anne paed")), [self.perera])
+
+    def test_fts_index_follows_updates(self):
+        self.perera.specialization = "Dermatology"
+        self.perera.save()
+        self.assertEqual(list(search_doctors("derm")), [self.perera])
+        self.assertEqual(list(search_doctors("paed")), [])
+
+    def test_prescription_form_accepts_any_case_code(self):
+        patient = Patient.objects.create(first_name="Jane", last_name="Doe", date_of_birth=date(1990, 1, 1))
+        form = PrescriptionForm(data={"patient": patient.pk, "doctor_medical_code": "md200", "doctor_last_name": "perera"})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["doctor"], self.perera)
+
+        response = self.client.get(reverse("doctor_autocomplete"), {"q": "smi"})
+        self.assertEqual(response.json()["results"][0]["medical_code"], "MD100")
+
+
+class DrugInteractionCheckTest(TestCase):
+    def setUp(self):
+        self.prescription = create_prescription(item_count=3)
+        DrugInteraction.objects.create(
+            drug1_name="PARACETAMOL 2", drug2_name="  paracetamol 0", severity="Mild",
+            interaction_description="Mild thing",
+        )
+
+    def test_pairs_are_matched_in_either_order_and_case(self):
+        self.assertEqual(len(find_interactions(["Paracetamol 0", "Paracetamol 2"])), 1)
+        self.assertEqual(find_interactions(["Paracetamol 2", "Paracetamol 1"]), [])
+
+        DrugInteraction.objects.create(
+            drug1_name="Paracetamol 1", drug2_name="Paracetamol 0", severity="Severe",
+            interaction_description="Severe thing",
+        )
+        hits = find_interactions(["paracetamol 0", "paracetamol 1", "paracetamol 2"])
+        self.assertEqual([description for _, description, _, _ in hits], ["Severe thing", "Mild thing"])
+
+    def test_item_views_update_the_warning(self):
+        item = self.prescription.items.get(medicine__name="Paracetamol 2")
+        medicine = item.medicine
+        self.client.post(reverse("delete_prescription_item", args=[self.prescription.pk, item.pk]))
+        self.prescription.refresh_from_db()
+        self.assertTrue(self.prescription.is_validated)
+        self.assertIsNone(self.prescription.interaction_warning)
+
+        self.client.post(reverse("add_prescription_item", args=[self.prescription.pk]), {
+            "medicine": medicine.pk, "requested_quantity": 1, "dosage": "1 tablet", "duration": "5 days",
+        })
+        self.prescription.refresh_from_db()
+        self.assertIn("Mild thing", self.prescription.interaction_warning)
+
+    def test_revalidate_command_writes_changed_prescriptions(self):
+        clean = create_prescription(item_count=1, tag="B")
+        call_command("revalidate_prescriptions", "--workers", "1", "--batch-size", "1", stdout=io.StringIO())
+        self.prescription.refresh_from_db()
+        clean.refresh_from_db()
+        self.assertTrue(self.prescription.is_validated)
+        self.assertIn("Mild thing", self.prescription.interaction_warning)
+        self.assertTrue(clean.is_validated)
+        self.assertIsNone(clean.interaction_warning)
+
+
+class DrugInteractionImportTest(TestCase):
+    def write(self, name, content):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_csv_pairs_are_upserted_in_canonical_order(self):
+        DrugInteraction.objects.create(drug1_name="Warfarin", drug2_name="Aspirin", interaction_description="Old")
+        path = self.write("interactions.csv", (
+            "drug1_name,drug2_name,interaction_description,severity\n"
+            "aspirin,WARFARIN,Bleeding risk,Severe\n"
+            "Simvastatin,Clarithromycin,Myopathy,Moderate\n"
+            "Clarithromycin,Simvastatin,Myopathy risk,Severe\n"
+            "Ibuprofen,,Missing drug,\n"
+        ))
+        out = io.StringIO()
+        call_command("import_drug_interactions", path, "--chunk-size", "2", stdout=out)
+        self.assertIn("skipped 1", out.getvalue())
+
+        rows = list(DrugInteraction.objects.order_by("pk").values_list(
+            "drug1_name", "drug2_name", "interaction_description", "severity"))
+        self.assertEqual(rows, [
+            ("Warfarin", "Aspirin", "Bleeding risk", "Severe"),
+            ("Clarithromycin", "Simvastatin", "Myopathy risk", "Severe"),
+        ])
+        self.assertEqual(len(find_interactions(["Simvastatin", "clarithromycin"])), 1)
+
+    def test_json_array_is_read_across_chunks(self):
+        items = [
+            {"drug1_name": f"Drug {i}", "drug2_name": f"Other {i}", "interaction_description": "x" * 50}
+            for i in range(30)
+        ]
+        path = self.write("interactions.json", json.dumps(items, indent=2))
+        with open(path, encoding="utf-8") as f, mock.patch("prescriptions.interaction_import._JSON_READ_SIZE", 64):
+            self.assertEqual(list(read_interactions(f, "json")), items)
+
+
+    def test_import_reaches_a_process_that_already_loaded_the_index(self):
+        DrugInteraction.objects.create(drug1_name="Warfarin", drug2_name="Aspirin", interaction_description="Bleeding")
+        self.assertEqual(find_interactions(["Simvastatin", "Clarithromycin"]), [])
+        # What a running web worker holds in memory
+        web_worker_index = interactions._loaded
+        self.addCleanup(setattr, interactions, "_loaded", None)
+
+        # The import command runs in its own process, with its own cache
+        with override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "import-process",
+        }}):
+            import_interactions([
+                {"drug1_name": "Simvastatin", "drug2_name": "Clarithromycin", "interaction_description": "Myopathy"},
+            ])
+
+        interactions._loaded = web_worker_index
+        self.assertEqual(len(find_interactions(["Simvastatin", "Clarithromycin"])), 1)
+
+
+class StockDispensingTest(TestCase):
+    def setUp(self):
+        self.prescription = create_prescription(item_count=1)
+        self.item = self.prescription.items.get()
+        self.medicine = self.item.medicine
+
+    def post_item(self, url_name, args, quantity, **extra):
+        return self.client.post(reverse(url_name, args=args), {
+            "medicine": self.medicine.pk, "requested_quantity": quantity,
+            "dosage": "1 tablet", "duration": "5 days", **extra,
+        })
+
+    def stock(self):
+        self.medicine.refresh_from_db()
+        return self.medicine.quantity_in_stock
+
+    def test_stock_is_taken_with_one_conditional_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.post_item("add_prescription_item", [self.prescription.pk], 30)
+        self.assertEqual(self.stock(), 70)
+        updates = [q["sql"] for q in queries.captured_queries
+                   if q["sql"].startswith('UPDATE "Medicine_inventory_medicine"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"image"', updates[0])
+        self.assertIn('"quantity_in_stock" >=', updates[0])
+
+    def test_shortage_needs_confirmation_then_dispenses_what_is_left(self):
+        self.post_item("add_prescription_item", [self.prescription.pk], 150)
+        self.assertEqual(self.stock(), 100)
+        self.post_item("add_prescription_item", [self.prescription.pk], 150, confirm_dispense="true")
+        self.assertEqual(self.stock(), 0)
+        self.assertEqual(self.prescription.items.get().dispensed_quantity, 102)
+
+    def test_dispensing_spans_batches_first_expiry_first(self):
+        def batch(number, days, quantity):
+            return make_medicine(
+                number, name=self.medicine.name, brand="Panadol", dosage=self.medicine.dosage,
+                quantity_in_stock=quantity, manufacture_date=date.today() - timedelta(days=400),
+                expiry_date=date.today() + timedelta(days=days), supplier="ABC Pharma",
+            )
+
+        expired = batch("OLD", -1, 50)
+        soon = batch("SOON", 10, 20)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(fefo_batches(self.medicine.name, self.medicine.dosage)), 2)
+
+        self.post_item("add_prescription_item", [self.prescription.pk], 30)
+        soon.refresh_from_db()
+        expired.refresh_from_db()
+        self.assertEqual((soon.quantity_in_stock, self.stock(), expired.quantity_in_stock), (0, 90, 50))
+        self.assertEqual(
+            sorted(self.prescription.items.values_list("medicine__batch_number", "dispensed_quantity")),
+            [("BATCH-A-000", 12), ("SOON", 20)],
+        )
+
+    def test_update_and_delete_return_stock(self):
+        self.post_item("update_prescription_item", [self.prescription.pk, self.item.pk], 10)
+        self.assertEqual(self.stock(), 92)
+        self.client.post(reverse("delete_prescription_item", args=[self.prescription.pk, self.item.pk]))
+        self.assertEqual(self.stock(), 102)
+
+
+class BatchDispenseTest(TestCase):
+    def setUp(self):
+        self.prescription = create_prescription(item_count=3)
+        self.first, self.second, self.third = Medicine.objects.order_by("pk")
+        self.url = reverse("dispense_prescription_items", args=[self.prescription.pk])
+
+    def dispense(self, items, **extra):
+        return self.client.post(self.url, json.dumps({"items": items, **extra}), content_type="application/json")
+
+    def line(self, medicine, quantity):
+        return {"medicine": medicine.pk, "requested_quantity": quantity, "dosage": "1 tablet", "duration": "3 days"}
+
+    def test_all_items_are_dispensed_in_one_response(self):
+        response = self.dispense([self.line(self.first, 10), self.line(self.second, 5)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["dispensed"], 15)
+        self.assertEqual(
+            list(Medicine.objects.order_by("pk").values_list("quantity_in_stock", flat=True)), [90, 95, 100],
+        )
+        self.assertEqual(self.prescription.items.get(medicine=self.first).dispensed_quantity, 12)
+
+    def test_a_shortage_dispenses_nothing_unless_partial(self):
+        response = self.dispense([self.line(self.first, 10), self.line(self.third, 150)])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["shortages"], [
+            {"index": 1, "medicine": self.third.pk, "requested": 150, "available": 100},
+        ])
+        self.assertFalse(Medicine.objects.exclude(quantity_in_stock=100).exists())
+
+        response = self.dispense([self.line(self.first, 10), self.line(self.third, 150)], partial=True)
+        self.assertEqual(response.json()["dispensed"], 110)
+        item = self.prescription.items.get(medicine=self.third)
+        self.assertEqual((item.requested_quantity, item.dispensed_quantity), (152, 102))
+
+    def test_partial_keeps_a_line_with_no_stock_on_the_prescription(self):
+        Medicine.objects.filter(pk=self.second.pk).update(quantity_in_stock=0)
+        response = self.dispense([self.line(self.first, 10), self.line(self.second, 5)], partial=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["dispensed"], 10)
+        item = self.prescription.items.get(medicine=self.second)
+        self.assertEqual((item.requested_quantity, item.dispensed_quantity), (7, 2))
+
+    def test_invalid_items_are_reported_by_index(self):
+        response = self.dispense([self.line(self.first, 1), {"medicine": 0, "requested_quantity": 0}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()["errors"]), ["1"])
+
+
+class MedicineSearchTest(TestCase):
+    def setUp(self):
+        self.prescription = create_prescription(item_count=3)
+        Medicine.objects.filter(name="Paracetamol 1").update(quantity_in_stock=0)
+        Medicine.objects.filter(name="Paracetamol 2").update(expiry_date=date.today())
+
+    def test_only_dispensable_batches_match_the_prefix(self):
+        url = reverse("medicine_search")
+        for query in ("paracetamol", "PARA", "Paracetamol 0"):
+            data = self.client.get(url, {"q": query}).json()
+            self.assertEqual([result["label"] for result in data["results"]], ["Paracetamol 0 - 500mg (BATCH-A-000)"])
+            self.assertIsNone(data["next"])
+        self.assertEqual(self.client.get(url, {"q": "aspirin"}).json()["results"], [])
+
+    def test_results_are_paged(self):
+        with mock.patch("prescriptions.views.MEDICINE_SEARCH_PAGE_SIZE", 1):
+            create_prescription(item_count=2, tag="B")
+            first = self.client.get(reverse("medicine_search"), {"q": "Para"}).json()
+            second = self.client.get(reverse("medicine_search"), {"q": "Para", "after": first["next"]}).json()
+        self.assertEqual(len(first["results"]), 1)
+        self.assertNotEqual(first["results"][0]["id"], second["results"][0]["id"])
+
+    def test_item_form_accepts_only_dispensable_batches(self):
+        data = {"dosage": "1 tablet", "duration": "3 days", "requested_quantity": 1}
+        for name, valid in (("Paracetamol 0", True), ("Paracetamol 1", False), ("Paracetamol 2", False)):
+            medicine = Medicine.objects.get(name=name)
+            with self.subTest(name=name):
+                self.assertEqual(PrescriptionItemForm({**data, "medicine": medicine.pk}).is_valid(), valid)
+        # An existing item can still be edited after its batch runs out
+        item = self.prescription.items.get(medicine__name="Paracetamol 1")
+        form = PrescriptionItemForm({**data, "medicine": item.medicine_id}, instance=item)
+        self.assertTrue(form.is_valid())
+
+    def test_detail_page_renders_only_the_selected_batch(self):
+        response = self.client.get(reverse("prescription_detail", args=[self.prescription.pk]))
+        self.assertNotContains(response, '<option value="%d"' % Medicine.objects.first().pk)
+
+
+class PrescriptionPdfCacheTest(TestCase):
+    def setUp(self):
+        cache_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_root, ignore_errors=True)
+        override = override_settings(PDF_CACHE_ROOT=cache_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.cache_dir = lambda pk: os.path.join(cache_root, "prescription", str(pk))
+        self.prescription = create_prescription()
+        self.url = reverse("generate_prescription_pdf", args=[self.prescription.pk])
+
+    def test_pdf_is_cached_and_revalidated_by_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        etag = response["ETag"]
+        self.assertEqual(os.listdir(self.cache_dir(self.prescription.pk)), [etag.strip('"') + ".pdf"])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_item_change_invalidates_cached_pdf(self):
+        etag = self.client.get(self.url)["ETag"]
+        item = self.prescription.items.get()
+        item.dispensed_quantity = 3
+        item.save()
+        self.assertFalse(os.path.exists(self.cache_dir(self.prescription.pk)))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class BatchPrintTest(TestCase):
+    def setUp(self):
+        cache_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_root, ignore_errors=True)
+        override = override_settings(PDF_CACHE_ROOT=cache_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.first = create_prescription(item_count=2)
+        self.second = Prescription.objects.create(patient=self.first.patient, doctor=self.first.doctor)
+
+    def test_batch_loads_in_constant_queries(self):
+        with self.assertNumQueries(3):
+            for prescription in batch_prescriptions(date_from=date.today()):
+                prescription_html(prescription)
+
+    def test_zip_contains_one_pdf_per_prescription(self):
+        data = render_prescription_zip(batch_prescriptions(ids=[self.first.pk, self.second.pk]), workers=1)
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertEqual(
+                archive.namelist(),
+                [f"prescription_{self.first.pk}.pdf", f"prescription_{self.second.pk}.pdf"],
+            )
+
+    def test_endpoint_renders_without_a_process_pool(self):
+        ids = f"{self.first.pk},{self.second.pk}"
+        with mock.patch("prescriptions.batch.ProcessPoolExecutor", side_effect=AssertionError("pool started")):
+            response = self.client.get(reverse("print_prescriptions"), {"ids": ids})
+        self.assertEqual(response["Content-Type"], "application/zip")
+
+    def test_endpoint_requires_a_selection(self):
+        response = self.client.get(reverse("print_prescriptions"))
+        self.assertRedirects(response, reverse("prescription_list"), fetch_redirect_response=False)
+
+        response = self.client.get(reverse("print_prescriptions"), {"ids": self.first.pk, "format": "pdf"})
+        self.assertEqual(response["Content-Type"], "application/pdf")
@@ -1,22 +1,32 @@
 # prescriptions/views.py
 
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, CreateView, DetailView, UpdateView, DeleteView
 from django.urls import reverse_lazy, reverse
 from django.db import transaction # Used for atomic operations (e.g., stock management)
 from django.contrib import messages # For displaying user feedback messages
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.db.models import Count
 from django.db.models.deletion import ProtectedError
 # Import models and forms from your prescriptions app
 from .models import Patient, Doctor, Prescription, PrescriptionItem, DrugInteraction
 from .forms import PatientForm, DoctorForm, PrescriptionForm, PrescriptionItemForm
 
-# Import the Medicine model from the Medicine_Inventory app
-from Medicine_inventory.models import Medicine
+from Medicine_inventory.pagination import keyset_paginate
+from Medicine_inventory.stock import (
+    InsufficientStock, StockChanged, StockShortage, allocate_fefo, return_stock, take_available_stock,
+)
 
 # For PDF generation
-from weasyprint import HTML
-import io
+from .pdf import prescription_fingerprint, render_prescription_pdf
+from .pdf_cache import cached_pdf_response
+from .interactions import check_prescription
+from .dispense import DispenseError, dispense_items, parse_dispense_lines
+from .search import search_doctors, search_medicines, search_patients
+from .batch import BATCH_FORMATS, MAX_BATCH_SIZE, batch_prescriptions, render_prescription_merged_pdf, render_prescription_zip
+from django.utils.dateparse import parse_date
 
 
 # --- Patient CRUD Views ---
@@ -38,9 +48,8 @@ class PatientListView(ListView):
         queryset = super().get_queryset()
         query = self.request.GET.get('q')
         if query:
-            # Filters patients whose first name or last name contains the query string (case-insensitive).
-            queryset = queryset.filter(first_name__icontains=query) | \
-                       queryset.filter(last_name__icontains=query)
+            # Every term must prefix-match a name, email or phone number; best matches first.
+            queryset = search_patients(query, queryset)
         return queryset
 
 class PatientCreateView(CreateView):
@@ -111,10 +120,8 @@ class DoctorListView(ListView):
         queryset = super().get_queryset()
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(first_name__icontains=query) | \
-                       queryset.filter(last_name__icontains=query) | \
-                       queryset.filter(specialization__icontains=query) | \
-                       queryset.filter(medical_code__icontains=query) # Added search by medical_code
+            # Exact medical codes hit the unique index; other queries go through the FTS index
+            queryset = search_doctors(query, queryset)
         return queryset
 
 class DoctorCreateView(CreateView):
@@ -165,7 +172,16 @@ class PrescriptionListView(ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # Join patient/doctor and compute item count and total in SQL, so a page
+        # costs the same number of queries whatever its size
+        queryset = (
+            super().get_queryset()
+            .select_related('patient', 'doctor')
+            .with_total_cost()
+            .annotate(item_count=Count('items'))
+            # Explicit ordering: the GROUP BY from Count drops Meta.ordering
+            .order_by('-prescription_date', '-pk')
+        )
         # Filtering by patient, doctor, date
         patient_query = self.request.GET.get('patient')
         doctor_query = self.request.GET.get('doctor')
@@ -182,9 +198,11 @@ class PrescriptionListView(ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Add lists of patients and doctors to the context for filter dropdowns
-        context['patients'] = Patient.objects.all().order_by('first_name')
-        context['doctors'] = Doctor.objects.all().order_by('first_name')
+        # The filters use the autocomplete endpoints; only the current selections are loaded
+        patient_id = self.request.GET.get('patient')
+        doctor_id = self.request.GET.get('doctor')
+        context['selected_patient'] = Patient.objects.filter(pk=patient_id).first() if patient_id and patient_id.isdigit() else None
+        context['selected_doctor'] = Doctor.objects.filter(pk=doctor_id).first() if doctor_id and doctor_id.isdigit() else None
         return context
 
 
@@ -211,14 +229,16 @@ class PrescriptionDetailView(DetailView):
     template_name = 'prescriptions/prescription_detail.html'
     context_object_name = 'prescription'
 
+    def get_queryset(self):
+        # Total cost is computed in SQL alongside the prescription itself
+        return super().get_queryset().select_related('patient', 'doctor').with_total_cost()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Get all PrescriptionItems related to this prescription
-        context['prescription_items'] = self.object.items.all()
+        context['prescription_items'] = self.object.items.select_related('medicine')
         # Form for adding new prescription items (will be displayed on the detail page)
         context['form'] = PrescriptionItemForm()
-        # All medicines for the dropdown in the PrescriptionItemForm
-        context['all_medicines'] = Medicine.objects.all().order_by('name', 'batch_number')
         
         # Check if there's a confirmation needed from a previous attempt to add an item
         if 'confirm_needed' in self.request.session:
@@ -247,76 +267,74 @@ def add_prescription_item(request, pk):
             medicine_selected = form.cleaned_data['medicine']
             requested_quantity = form.cleaned_data['requested_quantity']
 
+            medicine_in_stock = medicine_selected
+
             with transaction.atomic():
-                medicine_in_stock = Medicine.objects.select_for_update().get(pk=medicine_selected.pk)
-
-                if requested_quantity > medicine_in_stock.quantity_in_stock:
-                    # Insufficient stock, confirmation needed
-                    if not confirm_dispense:
-                        # Store data in session and redirect to detail page to show modal
-                        request.session['confirm_needed'] = {
-                            'confirm_needed': True,
-                            'medicine_name': medicine_in_stock.name,
-                            'medicine_batch': medicine_in_stock.batch_number,
-                            'available_quantity': medicine_in_stock.quantity_in_stock,
-                            'requested_quantity_initial': requested_quantity, # Store initial requested
-                            'form_data': request.POST.dict() # Store all form data for re-submission
-                        }
-                        messages.warning(request, f"Insufficient stock for {medicine_in_stock.name} (Batch: {medicine_in_stock.batch_number}). Only {medicine_in_stock.quantity_in_stock} available. Please confirm to dispense available quantity.")
-                        return redirect('prescription_detail', pk=prescription.pk)
-                    else:
-                        # Pharmacist confirmed to dispense available quantity
-                        dispensed_quantity = medicine_in_stock.quantity_in_stock
-                        messages.success(request, f"Dispensing available {dispensed_quantity} units of {medicine_in_stock.name} (Batch: {medicine_in_stock.batch_number}). Stock updated.")
-                else:
-                    # Sufficient stock, dispense requested quantity
-                    dispensed_quantity = requested_quantity
-                    messages.success(request, f"Added {dispensed_quantity} units of {medicine_in_stock.name} to prescription. Stock updated.")
-
-                if dispensed_quantity > 0:
+                try:
+                    # Dispense from the unexpired batches of this medicine, first expiry first out,
+                    # so one batch running short no longer needs a confirmation round trip.
+                    allocations = allocate_fefo(
+                        medicine_in_stock.name, medicine_in_stock.dosage, requested_quantity, partial=confirm_dispense,
+                        reference=f'prescription:{prescription.pk}',
+                    )
+                except InsufficientStock as shortage:
+                    # Insufficient stock across all batches, confirmation needed
+                    # Store data in session and redirect to detail page to show modal
+                    request.session['confirm_needed'] = {
+                        'confirm_needed': True,
+                        'medicine_name': medicine_in_stock.name,
+                        'medicine_batch': 'all unexpired batches',
+                        'available_quantity': shortage.available,
+                        'requested_quantity_initial': requested_quantity, # Store initial requested
+                        'form_data': request.POST.dict() # Store all form data for re-submission
+                    }
+                    messages.warning(request, f"Insufficient stock for {medicine_in_stock.name} ({medicine_in_stock.dosage}). Only {shortage.available} available across unexpired batches. Please confirm to dispense available quantity.")
+                    return redirect('prescription_detail', pk=prescription.pk)
+
+                dispensed_quantity = sum(taken for _, taken in allocations)
+                if dispensed_quantity == 0:
+                    # This case happens if the pharmacist confirmed but no unexpired stock is left.
+                    messages.warning(request, f"No unexpired stock of {medicine_in_stock.name} ({medicine_in_stock.dosage}) is available.")
+                    return redirect('prescription_detail', pk=prescription.pk)
+
+                # One item per batch; any confirmed shortfall stays on the first item's requested quantity.
+                shortfall = requested_quantity - dispensed_quantity
+                for index, (batch, taken) in enumerate(allocations):
+                    requested_from_batch = taken + (shortfall if index == 0 else 0)
                     existing_item = PrescriptionItem.objects.filter(
                         prescription=prescription,
-                        medicine=medicine_in_stock
+                        medicine=batch
                     ).first()
 
                     if existing_item:
-                        # If item already exists, update its quantity
-                        # When updating, we need to consider the difference from the original dispensed quantity
-                        # to correctly adjust stock. This logic is getting complex, so for simplicity
-                        # in the confirmation flow, we'll just add the newly dispensed amount.
-                        # For a robust update, you'd need to calculate the delta (new_dispensed - old_dispensed)
-                        # and adjust stock by that delta. For now, this is an 'add new' flow.
-                        existing_item.requested_quantity += requested_quantity # Update requested
-                        existing_item.dispensed_quantity += dispensed_quantity # Add newly dispensed to existing
+                        # If the batch is already on the prescription, add the newly dispensed amount to it.
+                        existing_item.requested_quantity += requested_from_batch # Update requested
+                        existing_item.dispensed_quantity += taken # Add newly dispensed to existing
                         existing_item.dosage = form.cleaned_data['dosage']
                         existing_item.duration = form.cleaned_data['duration']
                         existing_item.save()
-                        messages.info(request, f"Updated existing item for {medicine_in_stock.name} in prescription.")
                     else:
-                        prescription_item = form.save(commit=False)
-                        prescription_item.prescription = prescription
-                        prescription_item.dispensed_quantity = dispensed_quantity
-                        prescription_item.save()
+                        PrescriptionItem.objects.create(
+                            prescription=prescription,
+                            medicine=batch,
+                            dosage=form.cleaned_data['dosage'],
+                            duration=form.cleaned_data['duration'],
+                            requested_quantity=requested_from_batch,
+                            dispensed_quantity=taken,
+                        )
 
-                    medicine_in_stock.quantity_in_stock -= dispensed_quantity
-                    medicine_in_stock.save()
+                batches = ", ".join(f"{taken} from batch {batch.batch_number}" for batch, taken in allocations)
+                messages.success(request, f"Added {dispensed_quantity} units of {medicine_in_stock.name} to prescription ({batches}). Stock updated.")
 
-                    prescription.is_validated = False
-                    prescription.interaction_warning = None
-                    prescription.save()
+                check_prescription(prescription)
 
-                    return redirect('prescription_detail', pk=prescription.pk)
-                else:
-                    # This case happens if requested_quantity > available_stock, and available_stock is 0.
-                    # The message is already set above.
-                    return redirect('prescription_detail', pk=prescription.pk)
+                return redirect('prescription_detail', pk=prescription.pk)
         else:
             messages.error(request, "Error adding medicine to prescription. Please check your input.")
             context = {
                 'prescription': prescription,
                 'prescription_items': prescription.items.all(),
                 'form': form,
-                'all_medicines': Medicine.objects.all().order_by('name', 'batch_number')
             }
             return render(request, 'prescriptions/prescription_detail.html', context)
     return redirect('prescription_detail', pk=prescription.pk)
@@ -338,31 +356,31 @@ def update_prescription_item(request, pk, item_pk):
             medicine_selected = form.cleaned_data['medicine']
             new_requested_quantity = form.cleaned_data['requested_quantity']
 
-            with transaction.atomic():
-                # Lock the medicine row for update to prevent race conditions.
-                medicine_in_stock = Medicine.objects.select_for_update().get(pk=medicine_selected.pk)
+            medicine_in_stock = medicine_selected
 
+            with transaction.atomic():
                 # Calculate the change in quantity needed from stock.
                 # If new_requested_quantity is less than original, stock is returned.
                 # If new_requested_quantity is more than original, stock is taken.
                 quantity_difference = new_requested_quantity - original_dispensed_quantity
 
                 if quantity_difference > 0: # More quantity requested
-                    if quantity_difference <= medicine_in_stock.quantity_in_stock:
-                        new_dispensed_quantity = original_dispensed_quantity + quantity_difference
-                        medicine_in_stock.quantity_in_stock -= quantity_difference
+                    # Dispense up to available stock in one conditional UPDATE.
+                    actual_increase = take_available_stock(
+                        medicine_in_stock.pk, quantity_difference, reference=f'prescription:{prescription.pk}',
+                    )
+                    new_dispensed_quantity = original_dispensed_quantity + actual_increase
+                    if actual_increase == quantity_difference:
                         messages.success(request, f"Updated {medicine_in_stock.name} quantity. Stock decreased.")
                     else:
                         # Not enough stock for the full increase.
-                        # Dispense up to available stock.
-                        actual_increase = medicine_in_stock.quantity_in_stock
-                        new_dispensed_quantity = original_dispensed_quantity + actual_increase
-                        medicine_in_stock.quantity_in_stock -= actual_increase
                         messages.warning(request, f"Only {actual_increase} more units of {medicine_in_stock.name} (batch {medicine_in_stock.batch_number}) available. Dispensing up to total {new_dispensed_quantity}.")
                 else: # Quantity decreased or no change
                     new_dispensed_quantity = new_requested_quantity # Assume requested = dispensed for decrease
                     # Return the difference (absolute value) to stock.
-                    medicine_in_stock.quantity_in_stock += abs(quantity_difference)
+                    return_stock(
+                        medicine_in_stock.pk, abs(quantity_difference), reference=f'prescription:{prescription.pk}',
+                    )
                     messages.success(request, f"Updated {medicine_in_stock.name} quantity. Stock increased.")
 
                 # Update the PrescriptionItem with the new quantities.
@@ -372,12 +390,9 @@ def update_prescription_item(request, pk, item_pk):
                 prescription_item.duration = form.cleaned_data['duration']
                 prescription_item.medicine = medicine_selected # In case medicine itself was changed
                 prescription_item.save()
-                medicine_in_stock.save() # Save the updated medicine stock
 
-                # --- Drug Interaction Re-validation (Future Integration Point) ---
-                prescription.is_validated = False # Mark as needing re-validation
-                prescription.interaction_warning = None # Clear old warnings
-                prescription.save() # Save the prescription to update its validation status
+                # Re-check every pair of medicines now on the prescription.
+                check_prescription(prescription)
 
                 messages.success(request, "Prescription item updated successfully.")
                 return redirect('prescription_detail', pk=prescription.pk)
@@ -388,7 +403,6 @@ def update_prescription_item(request, pk, item_pk):
                 'prescription': prescription,
                 'prescription_items': prescription.items.all(),
                 'form': form, # Pass the form with errors back
-                'all_medicines': Medicine.objects.all().order_by('name', 'batch_number'),
                 'item_to_edit': prescription_item # To pre-fill the edit form
             }
             return render(request, 'prescriptions/prescription_detail.html', context)
@@ -399,7 +413,6 @@ def update_prescription_item(request, pk, item_pk):
             'prescription': prescription,
             'prescription_items': prescription.items.all(),
             'form': form,
-            'all_medicines': Medicine.objects.all().order_by('name', 'batch_number'),
             'item_to_edit': prescription_item # To pre-fill the edit form
         }
         return render(request, 'prescriptions/prescription_detail.html', context)
@@ -413,17 +426,16 @@ def delete_prescription_item(request, pk, item_pk):
     if request.method == 'POST':
         with transaction.atomic():
             # Before deleting, return the dispensed quantity to stock.
-            medicine_in_stock = Medicine.objects.select_for_update().get(pk=prescription_item.medicine.pk)
-            medicine_in_stock.quantity_in_stock += prescription_item.dispensed_quantity
-            medicine_in_stock.save()
+            return_stock(
+                prescription_item.medicine_id, prescription_item.dispensed_quantity,
+                reference=f'prescription:{prescription.pk}',
+            )
 
             # Delete the prescription item.
             prescription_item.delete()
 
-            # --- Drug Interaction Re-validation (Future Integration Point) ---
-            prescription.is_validated = False # Mark as needing re-validation
-            prescription.interaction_warning = None # Clear old warnings
-            prescription.save() # Save the prescription to update its validation status
+            # Re-check the remaining medicines; the removed one may have caused the warning.
+            check_prescription(prescription)
 
             messages.success(request, f"Medicine '{prescription_item.medicine.name}' removed from prescription and stock returned.")
         return redirect('prescription_detail', pk=prescription.pk)
@@ -434,6 +446,44 @@ def delete_prescription_item(request, pk, item_pk):
     })
 
 
+def dispense_prescription_items(request, pk):
+    """
+    Dispense many items in one request and one transaction. POST a JSON body:
+    {"items": [{"medicine": <id>, "requested_quantity": 2, "dosage": "...", "duration": "..."}, ...],
+     "partial": false}
+    Each medicine is dispensed first expiry first out across its batches. If any
+    item is short and "partial" is not true, nothing is dispensed and the
+    response (409) lists what is available.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST a JSON body.'}, status=405)
+    prescription = get_object_or_404(Prescription, pk=pk)
+    try:
+        payload = json.loads(request.body)
+        lines = parse_dispense_lines(payload)
+        results = dispense_items(prescription, lines, partial=payload.get('partial') is True)
+    except DispenseError as e:
+        return JsonResponse({'errors': e.errors}, status=400)
+    except ValueError:
+        return JsonResponse({'errors': {'__all__': 'The body must be JSON.'}}, status=400)
+    except StockShortage as shortage:
+        return JsonResponse({'shortages': [
+            {'index': index, 'medicine': lines[index][0].pk, 'requested': lines[index][1], 'available': available}
+            for index, available in shortage.shortages
+        ]}, status=409)
+    except StockChanged:
+        return JsonResponse({'errors': {'__all__': 'Stock changed while dispensing; please try again.'}}, status=409)
+
+    return JsonResponse({
+        'prescription': prescription.pk,
+        'items': results,
+        'dispensed': sum(result['dispensed'] for result in results),
+        'total_cost': Prescription.objects.with_total_cost().get(pk=prescription.pk).total_cost,
+        'is_validated': prescription.is_validated,
+        'interaction_warning': prescription.interaction_warning,
+    })
+
+
 class PrescriptionUpdateView(UpdateView):
     model = Prescription
     form_class = PrescriptionForm
@@ -443,10 +493,8 @@ class PrescriptionUpdateView(UpdateView):
     def form_valid(self, form):
         # The 'doctor' object is now available in form.cleaned_data due to custom validation in PrescriptionForm.
         form.instance.doctor = form.cleaned_data['doctor']
-        # When main prescription details are updated, re-evaluate interactions if needed.
-        # For now, just mark for re-validation.
-        form.instance.is_validated = False
-        form.instance.interaction_warning = None
+        # The items are unchanged, but keep the stored warning in step with them.
+        check_prescription(form.instance, save=False)
         messages.success(self.request, "Prescription details updated successfully!")
         return super().form_valid(form)
 
@@ -487,126 +535,100 @@ def mark_prescription_as_paid(request, pk):
 
 def generate_prescription_pdf(request, pk):
     # ADDED: Get the prescription and its items with a single query for efficiency
-    prescription = get_object_or_404(Prescription.objects.prefetch_related('items__medicine'), pk=pk)
-
-    # Create a file-like buffer to receive PDF data.
-    buffer = io.BytesIO()
-
-    # Generate table rows first
-    table_rows = "".join([
-        f"""
-        <tr>
-            <td>{item.medicine.name} ({item.medicine.batch_number})</td>
-            <td>{item.dosage}</td>
-            <td class="quantity-cell">{item.dispensed_quantity}</td>
-            <td>{item.medicine.description or 'N/A'}</td>
-            <td class="quantity-cell">${item.total_price:.2f}</td>
-        </tr>
-        """ for item in prescription.items.all()
-    ])
-
-    # Prepare the notes section separately
-    notes_section_html = ""
-    if prescription.notes:
-        notes_section_html = f"""
-        <div class="notes-section">
-            <h3>Notes:</h3>
-            <p>{prescription.notes}</p>
-        </div>
-        """
-    
-    # ADDED: Determine payment status string
-    payment_status = "Paid" if prescription.is_paid else "Unpaid"
-
-    # Construct the HTML content for the PDF
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Prescription #{prescription.id}</title>
-        <style>
-            body {{ font-family: sans-serif; margin: 0.75in; font-size: 10pt; }}
-            .header {{ text-align: center; margin-bottom: 20pt; }}
-            .header h1 {{ font-size: 24pt; margin-bottom: 5pt; color: #1a202c; }}
-            .header p {{ font-size: 9pt; color: #4a5568; }}
-            .line {{ border-bottom: 1pt solid #cbd5e0; margin-top: 20pt; margin-bottom: 30pt; }}
-            .section-title {{ font-size: 14pt; font-weight: bold; text-align: center; margin-bottom: 20pt; color: #2d3748; }}
-            .info-grid {{ display: grid; grid-template-columns: 1fr 1fr; gap: 10pt; margin-bottom: 20pt; }}
-            .info-item {{ margin-bottom: 5pt; }}
-            .info-item strong {{ font-weight: bold; color: #2d3748; }}
-            table {{ width: 100%; border-collapse: collapse; margin-bottom: 20pt; }}
-            th, td {{ border: 1pt solid #e2e8f0; padding: 8pt; text-align: left; vertical-align: middle; }}
-            th {{ background-color: #f7fafc; font-weight: bold; text-align: center; color: #2d3748; }}
-            .quantity-cell {{ text-align: center; }}
-            .notes-section {{ margin-top: 30pt; }}
-            .notes-section h3 {{ font-size: 12pt; font-weight: bold; margin-bottom: 10pt; color: #2d3748; }}
-            .footer {{ text-align: center; margin-top: 40pt; font-size: 10pt; color: #4a5568; }}
-            .footer strong {{ font-weight: bold; }}
-            .total-cost {{ font-size: 12pt; font-weight: bold; text-align: right; margin-top: 10pt; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>Your Pharmacy Name</h1>
-            <p>123 Pharmacy Lane, City, Country | Phone: (123) 456-7890</p>
-        </div>
-        <div class="line"></div>
-
-        <h2 class="section-title">Prescription Details</h2>
-
-        <div class="info-grid">
-            <div class="info-item">
-                <strong>Prescription ID:</strong> {prescription.id}
-            </div>
-            <div class="info-item">
-                <strong>Date:</strong> {prescription.prescription_date.strftime('%Y-%m-%d')}
-            </div>
-            <div class="info-item">
-                <strong>Patient:</strong> {prescription.patient.first_name} {prescription.patient.last_name} (DOB: {prescription.patient.date_of_birth.strftime('%Y-%m-%d')})
-            </div>
-            <div class="info-item">
-                <strong>Doctor:</strong> Dr. {prescription.doctor.first_name} {prescription.doctor.last_name} (Code: {prescription.doctor.medical_code}) ({prescription.doctor.specialization or 'N/A'})
-            </div>
-            <div class="info-item">
-                <strong>Payment Status:</strong> {payment_status}
-            </div>
-        </div>
-
-        <table>
-            <thead>
-                <tr>
-                    <th>Medicine Name</th>
-                    <th>Dosage</th>
-                    <th class="quantity-cell">Quantity</th>
-                    <th>Description</th>
-                    <th class="quantity-cell">Price</th>
-                </tr>
-            </thead>
-            <tbody>
-                {table_rows}
-            </tbody>
-        </table>
-        
-        <div class="total-cost">
-            Total Cost: ${prescription.total_cost:.2f}
-        </div>
-
-        {notes_section_html}
-
-        <div class="footer">
-            <p>Please present this PDF at the billing counter for payment.</p>
-            <p><strong>Thank you for choosing our pharmacy!</strong></p>
-        </div>
-    </body>
-    </html>
-    """
+    prescription = get_object_or_404(
+        Prescription.objects.select_related('patient', 'doctor').prefetch_related('items__medicine').with_total_cost(),
+        pk=pk,
+    )
+
+    # Serve the cached copy when nothing the PDF shows has changed
+    return cached_pdf_response(
+        request, 'prescription', prescription.pk,
+        prescription_fingerprint(prescription),
+        lambda: render_prescription_pdf(prescription),
+        f'prescription_{prescription.id}.pdf',
+    )
+
+
+# --- Bulk PDF Printing View ---
+# Prints a batch of prescriptions (e.g. the day's queue at opening time) in one download.
+
+def print_prescriptions(request):
+    output = request.GET.get('format', 'zip')
+    try:
+        ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk.strip()]
+        date_from = parse_date(request.GET.get('date_from') or '')
+        date_to = parse_date(request.GET.get('date_to') or '')
+    except ValueError:
+        messages.error(request, "Invalid prescription ids or dates for batch printing.")
+        return redirect('prescription_list')
+
+    if output not in BATCH_FORMATS or not (ids or date_from or date_to):
+        messages.error(request, "Choose a date range or prescriptions to print.")
+        return redirect('prescription_list')
+
+    prescriptions = list(batch_prescriptions(ids, date_from, date_to)[:MAX_BATCH_SIZE + 1])
+    if not prescriptions:
+        messages.info(request, "No prescriptions match the selected range.")
+        return redirect('prescription_list')
+    if len(prescriptions) > MAX_BATCH_SIZE:
+        messages.error(request, f"Batches are limited to {MAX_BATCH_SIZE} prescriptions; narrow the range or use the print_prescriptions command.")
+        return redirect('prescription_list')
+
+    if output == 'pdf':
+        response = HttpResponse(render_prescription_merged_pdf(prescriptions), content_type='application/pdf')
+        response['Content-Disposition'] = 'attachment; filename="prescriptions.pdf"'
+    else:
+        response = HttpResponse(render_prescription_zip(prescriptions), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="prescriptions.zip"'
+    return response
 
-    # Generate PDF from HTML content using WeasyPrint
-    HTML(string=html_content).write_pdf(buffer)
 
-    # Get the value of the BytesIO buffer and set up the HTTP response.
-    buffer.seek(0)
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="prescription_{prescription.id}.pdf"'
-    return response
+# --- Autocomplete Views ---
+# Small JSON lookups used by the filter and form inputs instead of rendering every row.
 
+AUTOCOMPLETE_LIMIT = 10
+
+
+def patient_autocomplete(request):
+    patients = search_patients(
+        request.GET.get('q', ''), Patient.objects.only('first_name', 'last_name'), limit=AUTOCOMPLETE_LIMIT,
+    )
+    results = [
+        {'id': patient.pk, 'label': f"{patient.first_name} {patient.last_name}"}
+        for patient in patients
+    ]
+    return JsonResponse({'results': results})
+
+
+MEDICINE_SEARCH_PAGE_SIZE = 20
+
+
+def medicine_search(request):
+    """
+    Dispensable medicine batches for the prescription item form: name prefix
+    ?q=, in stock and unexpired, paged by keyset with ?after=<next cursor>.
+    """
+    medicines = search_medicines(request.GET.get('q', '')).only(
+        'name', 'dosage', 'batch_number', 'expiry_date', 'quantity_in_stock',
+    )
+    page = keyset_paginate(medicines, 'name', after=request.GET.get('after'), page_size=MEDICINE_SEARCH_PAGE_SIZE)
+    results = [
+        {
+            'id': medicine.pk, 'label': str(medicine), 'expiry_date': medicine.expiry_date,
+            'quantity_in_stock': medicine.quantity_in_stock,
+        }
+        for medicine in page
+    ]
+    return JsonResponse({'results': results, 'next': page.next_cursor})
+
+
+def doctor_autocomplete(request):
+    doctors = search_doctors(
+        request.GET.get('q', ''), Doctor.objects.only('first_name', 'last_name', 'medical_code'), limit=AUTOCOMPLETE_LIMIT,
+    )
+    # medical_code and last_name let PrescriptionForm fill its verification fields
+    results = [
+        {'id': doctor.pk, 'label': str(doctor), 'medical_code': doctor.medical_code, 'last_name': doctor.last_name}
+        for doctor in doctors
+    ]
+    return JsonResponse({'results': results})